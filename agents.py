@@ -0,0 +1,939 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from string import Template
+
+import google.generativeai as genai
+import pandas as pd
+
+from cache import ResultCache, make_cache_key, normalize_text
+from checkpoint import candidate_id_for
+from compaction import CompactionStats, compact_resume, estimate_tokens
+from config import (
+    ANALYSIS_BATCH_MAX_SIZE, ANALYSIS_BATCH_OUTPUT_TOKENS, ANALYSIS_BATCH_TOKEN_BUDGET, ANALYSIS_OUTPUT_TOKENS,
+    CACHE_DB_PATH, CONTEXT_CACHE_MIN_TOKENS,
+    CONTEXT_CACHE_TTL_SECONDS, CV_ANALYSIS_PROMPT_VERSION, GEMINI_GENERATION_CONFIG, GEMINI_MAX_RETRIES, GEMINI_MODEL,
+    GEMINI_RETRY_BASE_SECONDS, GEMINI_RETRY_MAX_SECONDS, GEMINI_RPM, GEMINI_TPM, INVITATION_BATCH_SIZE,
+    INVITATION_MODE, JD_SUMMARY_PROMPT_VERSION, MAX_CONCURRENT_ANALYSES, MAX_PDF_CHARS, MAX_PDF_PAGES,
+    PRESCREEN_CUTOFF, PRESCREEN_MODE, RESUME_TOKEN_BUDGET, USE_CONTEXT_CACHE
+)
+from extraction import extract_pdf_text, is_resume_text
+from metrics import metrics
+from models import ModelRegistry
+from progress import COMPLETED, STARTED, progress_event, run_with_events
+from ratelimit import RateLimiter
+from schemas import (
+    CV_ANALYSIS_BATCH_SCHEMA, CV_ANALYSIS_SCHEMA, FIT_PARAGRAPH_BATCH_SCHEMA, JD_SUMMARY_SCHEMA,
+    json_generation_config, load_json, load_json_items, parse_structured, repair_prompt, validate
+)
+from screening import build_skill_index, prescreen_cv, prescreen_result
+
+# Gemini is configured once per process, on first use
+model_registry = ModelRegistry(os.getenv("GOOGLE_API_KEY"), GEMINI_MODEL, GEMINI_GENERATION_CONFIG)
+
+# Tracks models bound to cached prompt prefixes. Uses the SDK's explicit context caching
+# when it is available and enabled; otherwise (older SDKs, small prefixes, or remote=False
+# as a local stand-in) the prefix is sent inline and only reuse is counted.
+class PrefixCache:
+    def __init__(self, remote=USE_CONTEXT_CACHE, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS):
+        self.remote = remote
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.remote_entries = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._creating = {}
+    
+    # Returns (model, prefix_is_cached_remotely)
+    def model_for(self, prefix):
+        key = make_cache_key(prefix, GEMINI_MODEL)
+        
+        entry = self._lookup(key)
+        if entry:
+            return entry["model"], entry["remote"]
+        
+        # The remote create call runs outside the process-wide lock; a per-prefix lock keeps
+        # concurrent misses on the same prefix from creating it twice
+        with self._lock:
+            creating = self._creating.setdefault(key, threading.Lock())
+        with creating:
+            entry = self._lookup(key)
+            if entry:
+                return entry["model"], entry["remote"]
+            
+            with self._lock:
+                self.misses += 1
+            model, remote = self._create(prefix)
+            
+            with self._lock:
+                now = time.time()
+                self._entries = {k: e for k, e in self._entries.items() if e["expires_at"] > now}
+                self._entries[key] = {"model": model, "remote": remote, "expires_at": now + self.ttl_seconds}
+                self._creating.pop(key, None)
+                if remote:
+                    self.remote_entries += 1
+            return model, remote
+    
+    # Unexpired entry for a key (counted as a hit), or None
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > time.time():
+                self.hits += 1
+                return entry
+            return None
+    
+    def _create(self, prefix):
+        caching = getattr(genai, "caching", None)
+        if self.remote and caching is not None and estimate_tokens(prefix) >= CONTEXT_CACHE_MIN_TOKENS:
+            model_registry.configure()
+            try:
+                cached_content = caching.CachedContent.create(
+                    model=f"models/{GEMINI_MODEL}",
+                    contents=[prefix],
+                    ttl=timedelta(seconds=self.ttl_seconds)
+                )
+                return model_registry.from_cached_content(cached_content), True
+            except Exception:
+                # Fall back to sending the prefix inline
+                pass
+        return model_registry.get(), False
+    
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "remote_entries": self.remote_entries}
+
+# Generate from a shared prefix plus a per-request suffix. The prefix always comes first
+# and is byte-identical across calls, so it also benefits from implicit prefix caching.
+def generate_with_prefix(prefix, suffix, generation_config=None):
+    model, prefix_cached = prefix_cache.model_for(prefix)
+    contents = [suffix] if prefix_cached else [prefix, suffix]
+    return generate_content(model, contents, generation_config)
+
+# Every model call goes through here: process-wide rate limiting, plus retries with backoff
+# on quota and transient server errors instead of failing the candidate
+def generate_content(model, contents, generation_config=None):
+    parts = [contents] if isinstance(contents, str) else contents
+    response = rate_limiter.call(
+        lambda: model.generate_content(contents, generation_config=generation_config),
+        sum(estimate_tokens(part) for part in parts),
+        GEMINI_MAX_RETRIES, GEMINI_RETRY_BASE_SECONDS, GEMINI_RETRY_MAX_SECONDS
+    )
+    rate_limiter.consume(estimate_tokens(response_text_of(response)))
+    return response
+
+# Ask for JSON matching schema through generate(extra_prompt, generation_config). An unusable
+# answer gets one repair attempt that names what was wrong. Returns (value, errors).
+def generate_structured(generate, schema):
+    generation_config = json_generation_config(schema)
+    response_text = response_text_of(generate("", generation_config))
+    value, errors = parse_structured(response_text, schema)
+    
+    if errors:
+        response_text = response_text_of(generate(repair_prompt(response_text, errors), generation_config))
+        value, errors = parse_structured(response_text, schema)
+        metrics.inc("json_repairs_total", outcome="failed" if errors else "fixed")
+    
+    return value, errors
+
+def response_text_of(response):
+    try:
+        return response.text if response else ""
+    except (AttributeError, ValueError):
+        # Blocked or empty responses have no text
+        return ""
+
+# Shared by every thread and Streamlit session in the process
+analysis_cache = ResultCache(CACHE_DB_PATH, "cv_analysis")
+summary_cache = ResultCache(CACHE_DB_PATH, "jd_summary")
+prefix_cache = PrefixCache()
+rate_limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM)
+compaction_stats = CompactionStats()
+
+# Figures the components above already keep, read when metrics are exported
+def collect_metrics():
+    samples = []
+    for name, cache in (("cv_analysis", analysis_cache), ("jd_summary", summary_cache), ("prefix", prefix_cache)):
+        samples.append(("cache_requests_total", {"cache": name, "result": "hit"}, cache.hits))
+        samples.append(("cache_requests_total", {"cache": name, "result": "miss"}, cache.misses))
+    
+    limiter = rate_limiter.stats()
+    samples.append(("model_calls_total", {}, limiter["calls"]))
+    samples.append(("model_retries_total", {}, limiter["retries"]))
+    samples.append(("model_throttled_seconds_total", {}, rate_limiter.throttled_seconds))
+    samples.append(("model_tokens_total", {"direction": "input"}, limiter["input_tokens"]))
+    samples.append(("model_tokens_total", {"direction": "output"}, limiter["output_tokens"]))
+    samples.append(("resume_tokens_saved_total", {}, compaction_stats.stats()["tokens_saved"]))
+    return samples
+
+metrics.add_collector(collect_metrics)
+
+# Function to extract text from PDF
+def input_pdf_text(uploaded_file):
+    result = extract_pdf_text(uploaded_file.getvalue(), MAX_PDF_PAGES, MAX_PDF_CHARS)
+    metrics.record_stage("pdf_extraction", result["seconds"], "error" if result["error"] else "ok")
+    return result["text"]
+
+# Function to read each job (title + description) from a CSV row
+def read_jobs_from_csv(uploaded_file):
+    try:
+        df = pd.read_csv(uploaded_file)
+
+        if df.empty:
+            return {"error": "The CSV file is empty."}
+
+        # Look for job description column
+        jd_columns = ['job_description', 'jobdescription', 'description', 'jd', 'job', 'text', 'Job Description']
+        jd_column = next((col for col in jd_columns if col in df.columns), None)
+
+        if jd_column is None:
+            return {"error": "No recognizable job description column found."}
+
+        # Look for job title column
+        title_columns = ['job_title', 'title', 'position', 'Job Title']
+        title_column = next((col for col in title_columns if col in df.columns), None)
+
+        if title_column is None:
+            return {"error": "No recognizable job title column found."}
+
+        jobs = []
+        for i, row in df[[title_column, jd_column]].dropna().iterrows():
+            jobs.append({
+                "title": str(row[title_column]).strip(),
+                "description": str(row[jd_column]).strip()
+            })
+
+        return {"jobs": jobs}
+
+    except Exception as e:
+        return {"error": f"Error reading CSV file: {str(e)}"}
+
+# Function to read job description from CSV
+def read_jd_from_csv(uploaded_file): 
+    parsed = read_jobs_from_csv(uploaded_file)
+    if "error" in parsed:
+        return parsed["error"]
+
+    # Extract and format
+    formatted_descriptions = []
+    for job in parsed["jobs"]:
+        formatted_descriptions.append(f"---\n**{job['title']}:**\n{job['description']}\n")
+
+    return "\n".join(formatted_descriptions)
+
+# Text sent to the summarizer for a single CSV job row
+def job_text(job):
+    return f"Job Title: {job['title']}\n{job['description']}"
+
+
+
+# Job Description Summarizer Agent
+@metrics.instrument("jd_summary")
+def summarize_job_description(jd_text):
+    # Reused postings differ at most in whitespace or casing, so key on the normalized text
+    cache_key = make_cache_key(normalize_text(jd_text).lower(), GEMINI_MODEL, JD_SUMMARY_PROMPT_VERSION)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+    
+    model = model_registry.get()
+    
+    prompt = f"""
+    Act as an expert job description analyzer. Review the following job description and extract 
+    key elements in a structured format.
+    
+    Job Description: {jd_text}
+    
+    Respond with a valid JSON object containing these fields:
+    {{
+      "JobTitle": "title here",
+      "Department": "department name",
+      "Location": "location",
+      "EmploymentType": "full-time/part-time/contract",
+      "RequiredSkills": ["skill1", "skill2", "..."],
+      "RequiredExperience": "X years in...",
+      "RequiredQualifications": ["qualification1", "qualification2", "..."],
+      "Responsibilities": ["responsibility1", "responsibility2", "..."],
+      "SalaryRange": "range if mentioned",
+      "PreferredSkills": ["skill1", "skill2", "..."]
+    }}
+    
+    Important: Only respond with the JSON object and nothing else. No explanations or markdown formatting.
+    """
+    
+    try:
+        summary, errors = generate_structured(
+            lambda extra, config: generate_content(model, prompt + extra, config),
+            JD_SUMMARY_SCHEMA
+        )
+        if errors:
+            return {"error": f"The job description summary did not match the expected format: {errors[0]}"}
+        
+        summary_cache.set(cache_key, summary)
+        return summary
+            
+    except Exception as e:
+        return {"error": f"Failed to process the JD: {str(e)}"}
+
+# Job requirements block shared by the single and batched analysis prompts
+def format_job_requirements(jd_summary):
+    required_skills = ", ".join(jd_summary.get("RequiredSkills", []))
+    preferred_skills = ", ".join(jd_summary.get("PreferredSkills", []))
+    responsibilities = ", ".join(jd_summary.get("Responsibilities", []))
+    qualifications = ", ".join(jd_summary.get("RequiredQualifications", []))
+    
+    return f"""
+    Job Title: {jd_summary.get("JobTitle", "Not specified")}
+    Required Skills: {required_skills}
+    Preferred Skills: {preferred_skills}
+    Required Experience: {jd_summary.get("RequiredExperience", "Not specified")}
+    Required Qualifications: {qualifications}
+    Key Responsibilities: {responsibilities}
+    """
+
+CV_ANALYSIS_FIELDS = """
+      "CandidateName": "full name",
+      "ContactInfo": "email and/or phone",
+      "Skills": ["skill1", "skill2", "..."],
+      "Experience": ["experience1", "experience2", "..."],
+      "Education": ["education1", "education2", "..."],
+      "Certifications": ["cert1", "cert2", "..."],
+      "SkillMatch": "X%",
+      "ExperienceMatch": "X%",
+      "QualificationMatch": "X%",
+      "OverallMatch": "X%",
+      "MatchedSkills": ["skill1", "skill2", "..."],
+      "MissingSkills": ["skill1", "skill2", "..."],
+      "Strengths": ["strength1", "strength2", "..."],
+      "Areas_for_Improvement": ["area1", "area2", "..."],
+      "Recommendation": "shortlist/reject/further review"
+"""
+
+# Stable prompt prefix shared by every analysis request for a job (single and batched)
+def build_analysis_prefix(jd_summary):
+    return f"""
+    Act as a senior recruiting agent specializing in talent acquisition. Analyze candidate 
+    resumes against the job requirements below and provide a detailed evaluation of each 
+    candidate independently.
+    {format_job_requirements(jd_summary)}
+    Each candidate evaluation is a JSON object containing:
+    {{{CV_ANALYSIS_FIELDS}    }}
+    
+    Important: Only provide JSON. No additional text, no markdown formatting.
+    """
+
+# Compact resumes once, before any prompt is built. Analysis prompts, batch packing and
+# cache keys all use the compacted text; the local pre-screen keeps the full text.
+def compact_resumes(cv_texts):
+    compacted = []
+    for cv_text in cv_texts:
+        text, trimmed = compact_resume(cv_text, RESUME_TOKEN_BUDGET)
+        compaction_stats.record(cv_text, text, trimmed)
+        compacted.append(text)
+    return compacted
+
+def cv_analysis_cache_key(cv_text, jd_summary):
+    return make_cache_key(normalize_text(cv_text), jd_summary, GEMINI_MODEL, CV_ANALYSIS_PROMPT_VERSION)
+
+# Recruiting Agent for CV Analysis; cv_text is a compacted resume (see compact_resumes).
+# use_cache=False skips the cache lookup (the caller already knows it is a miss); the new
+# result is still cached.
+@metrics.instrument("cv_analysis")
+def analyze_cv(cv_text, jd_summary, use_cache=True):
+    # Return a previously scored CV/JD pair without calling the API
+    cache_key = cv_analysis_cache_key(cv_text, jd_summary)
+    cached_result = analysis_cache.get(cache_key) if use_cache else None
+    if cached_result is not None:
+        return cached_result
+    
+    prompt = f"""
+    Candidate Resume: {cv_text}
+    
+    Respond with ONLY a valid JSON object with the evaluation of this candidate.
+    """
+    
+    try:
+        prefix = build_analysis_prefix(jd_summary)
+        result, errors = generate_structured(
+            lambda extra, config: generate_with_prefix(prefix, prompt + extra, config),
+            CV_ANALYSIS_SCHEMA
+        )
+        if errors:
+            # Not cached, so the candidate is analyzed again on the next run
+            return {"error": f"The CV analysis did not match the expected format: {errors[0]}"}
+        
+        analysis_cache.set(cache_key, result)
+        return result
+            
+    except Exception as e:
+        return {"error": f"Failed to analyze CV: {str(e)}"}
+
+# Recruiting Agent for several CVs in one request. Returns one result per CV, in order,
+# with None for candidates missing from the response so callers can retry them individually.
+@metrics.instrument("cv_analysis_batch")
+def analyze_cv_batch(cv_texts, jd_summary):
+    candidates_text = "\n".join(
+        f"    === Candidate {i} ===\n    {cv_text}\n" for i, cv_text in enumerate(cv_texts)
+    )
+    
+    prompt = f"""
+    Candidates:
+{candidates_text}
+    Respond with ONLY a valid JSON array containing exactly one evaluation object per candidate. 
+    Each object must also include "CandidateId" set to the candidate number shown above.
+    """
+    
+    results = [None] * len(cv_texts)
+    
+    response = generate_with_prefix(
+        build_analysis_prefix(jd_summary), prompt, json_generation_config(CV_ANALYSIS_BATCH_SCHEMA)
+    )
+    response_text = response_text_of(response)
+    try:
+        parsed = load_json(response_text, CV_ANALYSIS_BATCH_SCHEMA)
+    except json.JSONDecodeError:
+        # An answer cut off at the output limit still holds its complete evaluations
+        parsed = load_json_items(response_text)
+    
+    if not isinstance(parsed, list):
+        return results
+    
+    # Match results back to candidates by id, never by position. Invalid items are dropped
+    # here and retried through the single-candidate path, which has its own repair attempt.
+    for item in parsed:
+        errors = []
+        item = validate(item, CV_ANALYSIS_BATCH_SCHEMA["items"], "$", errors)
+        if errors:
+            continue
+        candidate_id = item.pop("CandidateId")
+        
+        if 0 <= candidate_id < len(cv_texts) and results[candidate_id] is None:
+            results[candidate_id] = item
+            analysis_cache.set(cv_analysis_cache_key(cv_texts[candidate_id], jd_summary), item)
+    
+    return results
+
+# Greedily pack resumes into batches that fit the input token budget, with no more
+# evaluations than the model's output limit can hold; returns lists of indices
+def plan_analysis_batches(cv_texts, indices, jd_summary, token_budget=None, max_size=None):
+    token_budget = token_budget or ANALYSIS_BATCH_TOKEN_BUDGET
+    output_limit = GEMINI_GENERATION_CONFIG.get("max_output_tokens") or ANALYSIS_BATCH_OUTPUT_TOKENS
+    max_size = max(1, min(max_size or ANALYSIS_BATCH_MAX_SIZE, output_limit // max(1, ANALYSIS_OUTPUT_TOKENS)))
+    
+    prompt_tokens = estimate_tokens(build_analysis_prefix(jd_summary)) + 100
+    batches = []
+    current, current_tokens = [], prompt_tokens
+    
+    for i in indices:
+        cv_tokens = estimate_tokens(cv_texts[i])
+        if current and (len(current) >= max_size or current_tokens + cv_tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], prompt_tokens
+        current.append(i)
+        current_tokens += cv_tokens
+    
+    if current:
+        batches.append(current)
+    return batches
+
+# Pre-screen every (job, candidate) pair locally. Returns the pairs still to send to the
+# model, strongest first (by pre-screen score, then similarity); in skip mode, pairs below
+# the cutoff get a local result instead. Texts with no resume content (failed or image-only
+# extractions) are not scored locally: they go to the model last and are never skipped.
+def prescreen_pairs(cv_texts, job_summaries, matrix, on_event=None, similarity=None, on_result=None):
+    # Pairs restored from a checkpoint already have a result
+    pairs = [
+        (j, i) for j in range(len(job_summaries)) for i in range(len(cv_texts))
+        if matrix[j][i] is None
+    ]
+    
+    screens = {}
+    if PRESCREEN_CUTOFF > 0:
+        for j, jd_summary in enumerate(job_summaries):
+            skill_index = build_skill_index(jd_summary)
+            for i, cv_text in enumerate(cv_texts):
+                if is_resume_text(cv_text):
+                    screens[(j, i)] = prescreen_cv(cv_text, skill_index)
+    
+    pairs.sort(
+        key=lambda pair: (
+            screens[pair]["score"] if pair in screens else -1,
+            similarity[pair[0]][pair[1]] if similarity else 0
+        ),
+        reverse=True
+    )
+    if not screens or PRESCREEN_MODE != "skip":
+        return pairs
+    
+    remaining = []
+    for j, i in pairs:
+        screen = screens.get((j, i))
+        if screen is None or screen["score"] >= PRESCREEN_CUTOFF:
+            remaining.append((j, i))
+            continue
+        
+        matrix[j][i] = prescreen_result(cv_texts[i], screen)
+        metrics.inc("fallbacks_total", stage="prescreen")
+        if on_event:
+            on_event(progress_event("analysis", STARTED, (j, i)))
+            on_event(progress_event("analysis", COMPLETED, (j, i), 0.0))
+        if on_result:
+            on_result(j, i, matrix[j][i])
+    
+    return remaining
+
+# Run func(index, item, publish) over items with a bounded thread pool, keeping results in
+# input order. Workers publish progress events through publish; they are relayed to
+# on_event on the calling thread (Streamlit calls are only safe on the script thread).
+# on_result(index, result) is also called on the calling thread as each item finishes.
+def run_in_pool(func, items, max_workers=None, on_event=None, on_result=None):
+    results = [None] * len(items)
+    if not items:
+        return results
+    
+    max_workers = max(1, min(max_workers or MAX_CONCURRENT_ANALYSES, len(items)))
+    events = queue.Queue()
+    
+    def relay_events():
+        while not events.empty():
+            event = events.get_nowait()
+            if on_event:
+                on_event(event)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(func, i, item, events.put): i
+            for i, item in enumerate(items)
+        }
+        
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            relay_events()
+            for future in done:
+                index = futures[future]
+                results[index] = future.result()
+                if on_result:
+                    on_result(index, results[index])
+    
+    relay_events()
+    return results
+
+# Run func(item) over items concurrently, publishing one event per item for the given stage
+def run_concurrently(stage, func, items, max_workers=None, on_event=None, on_result=None):
+    def run(index, item, publish):
+        try:
+            return run_with_events(stage, index, publish, func, item)
+        except Exception as e:
+            # Keep a failure isolated to its own item
+            return {"error": f"Failed to process {stage} item: {str(e)}"}
+    
+    return run_in_pool(run, items, max_workers, on_event, on_result)
+
+# Score every resume against every job; returns matrix[job_index][candidate_index].
+# An optional similarity matrix orders the model queue so likely matches finish first.
+# on_result(job_index, candidate_index, result) streams each pair's result as it lands.
+# With a RunCheckpoint, pairs finished by an earlier attempt of the run are not sent again.
+# refresh=True ignores cached analyses and sends every pair (new results are still cached).
+def analyze_cv_matrix(cv_texts, job_summaries, max_workers=None, on_event=None, similarity=None, on_result=None,
+                      checkpoint=None, candidate_ids=None, refresh=False):
+    matrix = [[None] * len(cv_texts) for _ in job_summaries]
+    if checkpoint is not None:
+        candidate_ids = candidate_ids or [candidate_id_for(cv_text) for cv_text in cv_texts]
+        on_result = resume_from_checkpoint(checkpoint, candidate_ids, matrix, on_event, on_result)
+    
+    pairs = prescreen_pairs(cv_texts, job_summaries, matrix, on_event, similarity, on_result)
+    cv_texts = compact_resumes(cv_texts) if pairs else cv_texts
+    
+    # Pairs left over from batching were already looked up in the cache and missed
+    batched = ANALYSIS_BATCH_TOKEN_BUDGET > 0 and len(pairs) > 1
+    if batched:
+        pairs = analyze_cv_matrix_batched(
+            cv_texts, job_summaries, pairs, matrix, max_workers, on_event, on_result, use_cache=not refresh
+        )
+    
+    def record(index, result):
+        j, i = pairs[index]
+        matrix[j][i] = result
+        if on_result:
+            on_result(j, i, result)
+    
+    # Analyze remaining pairs one request each (all pairs when batching is off)
+    run_concurrently(
+        "analysis", lambda pair: analyze_cv(cv_texts[pair[1]], job_summaries[pair[0]], use_cache=not (batched or refresh)),
+        pairs, max_workers, on_event, record
+    )
+    return matrix
+
+# Fill the matrix with the results a checkpoint already holds and return an on_result
+# callback that saves every new result before passing it on. Errors are not saved, so a
+# restarted run retries them.
+def resume_from_checkpoint(checkpoint, candidate_ids, matrix, on_event=None, on_result=None):
+    saved = checkpoint.results()
+    for j, row in enumerate(matrix):
+        for i, candidate_id in enumerate(candidate_ids):
+            result = saved.get((candidate_id, j))
+            if result is None:
+                continue
+            
+            row[i] = result
+            if on_event:
+                on_event(progress_event("analysis", STARTED, (j, i)))
+                on_event(progress_event("analysis", COMPLETED, (j, i), 0.0))
+            if on_result:
+                on_result(j, i, result)
+    
+    def save(j, i, result):
+        if "error" not in result:
+            checkpoint.save_result(candidate_ids[i], j, result)
+        if on_result:
+            on_result(j, i, result)
+    
+    return save
+
+# Fill the matrix for the given pairs using multi-resume requests; returns the pairs still
+# missing a result, in their original order, so they can be retried individually
+def analyze_cv_matrix_batched(cv_texts, job_summaries, pairs, matrix, max_workers=None, on_event=None, on_result=None,
+                              use_cache=True):
+    # Cached pairs never go into a batch
+    misses = {}
+    for j, i in pairs:
+        cached_result = analysis_cache.get(cv_analysis_cache_key(cv_texts[i], job_summaries[j])) if use_cache else None
+        if cached_result is None:
+            misses.setdefault(j, []).append(i)
+            continue
+        
+        matrix[j][i] = cached_result
+        if on_event:
+            on_event(progress_event("analysis", STARTED, (j, i)))
+            on_event(progress_event("analysis", COMPLETED, (j, i), 0.0))
+        if on_result:
+            on_result(j, i, cached_result)
+    
+    work = []
+    for j, indices in misses.items():
+        for batch in plan_analysis_batches(cv_texts, indices, job_summaries[j]):
+            # Single resumes use the regular prompt and its fallback handling
+            if len(batch) > 1:
+                work.append((j, batch))
+    
+    def run_batch(index, job_batch, publish):
+        j, batch = job_batch
+        for i in batch:
+            publish(progress_event("analysis", STARTED, (j, i)))
+        
+        start = time.perf_counter()
+        try:
+            batch_results = analyze_cv_batch([cv_texts[i] for i in batch], job_summaries[j])
+        except Exception:
+            batch_results = [None] * len(batch)
+        latency = time.perf_counter() - start
+        
+        # Candidates without a usable result are reported when their retry finishes
+        for i, result in zip(batch, batch_results):
+            if result is not None:
+                publish(progress_event("analysis", COMPLETED, (j, i), latency))
+        return batch_results
+    
+    # Missing results stay None here and are streamed once their retry finishes
+    def record(index, batch_results):
+        j, batch = work[index]
+        for i, result in zip(batch, batch_results):
+            matrix[j][i] = result
+            if result is None:
+                metrics.inc("fallbacks_total", stage="cv_analysis_batch")
+            elif on_result:
+                on_result(j, i, result)
+    
+    run_in_pool(run_batch, work, max_workers, on_event, record)
+    return [(j, i) for j, i in pairs if matrix[j][i] is None]
+
+# Summarize each CSV job row concurrently, keeping results in row order
+def summarize_jobs_concurrently(jobs, max_workers=None, on_event=None):
+    return run_concurrently(
+        "summarization", lambda job: summarize_job_description(job_text(job)),
+        jobs, max_workers, on_event
+    )
+
+# Build the candidate x job overall match table
+def build_match_matrix(analysis_matrix, job_summaries):
+    rows = []
+    if not analysis_matrix:
+        return pd.DataFrame(rows)
+    
+    for i in range(len(analysis_matrix[0])):
+        results = [job_results[i] for job_results in analysis_matrix]
+        named = next((r for r in results if "error" not in r), {})
+        row = {"Candidate": named.get("CandidateName", f"Candidate {i+1}")}
+        
+        best_job, best_match = None, -1
+        for j, result in enumerate(results):
+            title = job_summaries[j].get("JobTitle", f"Job {j+1}")
+            column = title if title not in row else f"{title} ({j+1})"
+            match = None if "error" in result else int(result.get("OverallMatch", "0%").strip("%"))
+            row[column] = match
+            if match is not None and match > best_match:
+                best_job, best_match = title, match
+        
+        row["Best Job"] = best_job or "-"
+        rows.append(row)
+    
+    return pd.DataFrame(rows)
+
+# Candidate Shortlisting Agent
+def shortlist_candidates(candidates_analysis, threshold=70):
+    shortlisted = []
+    
+    for candidate in candidates_analysis:
+        # Skip entries with errors
+        if "error" in candidate:
+            continue
+            
+        # Extract match percentage
+        match_percentage = int(candidate.get("OverallMatch", "0%").strip("%"))
+        
+        if match_percentage >= threshold:
+            shortlisted.append({
+                "name": candidate.get("CandidateName", "Unknown"),
+                "contact": candidate.get("ContactInfo", "Not provided"),
+                "match_percentage": match_percentage,
+                "strengths": candidate.get("Strengths", []),
+                "missing_skills": candidate.get("MissingSkills", []),
+                "recommendation": candidate.get("Recommendation", "")
+            })
+    
+    # Sort by match percentage (highest first)
+    shortlisted.sort(key=lambda x: x["match_percentage"], reverse=True)
+    return shortlisted
+
+# Fixed parts of every invitation, rendered locally; only the fit paragraph is personalized
+INVITATION_TEMPLATE = Template("""Dear $name,
+
+Congratulations! We are pleased to inform you that you have been shortlisted for the $job_title position at $company.
+
+$fit_paragraph
+
+We would like to invite you for a video interview to discuss your experience and the role in more detail. Please let us know which of the following time slots would work best for you:
+$slots
+
+The interview will be conducted via Zoom, and we will send you the meeting details once you confirm your preferred time slot.
+
+If you have any questions, please don't hesitate to reply to this email.
+
+We look forward to speaking with you soon!
+
+Best regards,
+Recruiting Team
+$company""")
+
+# Five slots over the next three business days
+def proposed_interview_slots():
+    today = datetime.now()
+    proposed_dates = []
+    
+    for i in range(1, 8):
+        next_date = today + timedelta(days=i)
+        # Skip weekends (5 = Saturday, 6 = Sunday)
+        if next_date.weekday() < 5:
+            proposed_dates.append(next_date.strftime("%A, %B %d, %Y"))
+            if len(proposed_dates) == 3:  # Get 3 business days
+                break
+    
+    # Generate interview times
+    interview_times = ["10:00 AM", "11:30 AM", "2:00 PM", "3:30 PM"]
+    proposed_slots = [f"{date} at {time}" for date in proposed_dates for time in random.sample(interview_times, 2)]
+    return proposed_slots[:5]
+
+def strengths_text_for(candidate_info):
+    return ", ".join(candidate_info.get("strengths", [])[:3]) or "qualifications and experience"
+
+# Used when the model gives no paragraph for a candidate
+def default_fit_paragraph(candidate_info):
+    return f"We were impressed with your profile, in particular your {strengths_text_for(candidate_info)}."
+
+def render_invitation(candidate_info, jd_summary, fit_paragraph=None, proposed_slots=None):
+    proposed_slots = proposed_slots or proposed_interview_slots()
+    job_title = jd_summary.get("JobTitle", "the open position")
+    company = os.getenv("COMPANY_NAME", "Our Company")
+    
+    return {
+        "candidate_name": candidate_info['name'],
+        "candidate_email": candidate_info['contact'],
+        "email_subject": f"Interview Invitation: {job_title} position at {company}",
+        "email_body": INVITATION_TEMPLATE.substitute(
+            name=candidate_info['name'],
+            job_title=job_title,
+            company=company,
+            fit_paragraph=fit_paragraph or default_fit_paragraph(candidate_info),
+            slots="\n".join(f"- {slot}" for slot in proposed_slots)
+        ),
+        "proposed_slots": proposed_slots
+    }
+
+# Short "why you're a fit" paragraphs for several (candidate_info, jd_summary) pairs in one
+# request. Returns one paragraph per pair, in order; candidates the model skipped (or every
+# candidate, if the request fails) get the default paragraph.
+@metrics.instrument("fit_paragraphs")
+def generate_fit_paragraphs(invitations):
+    invitees = "\n".join(
+        f"""    --- Invitee {i} ---
+    Name: {candidate_info['name']}
+    Role: {jd_summary.get("JobTitle", "the open position")}
+    Strengths: {strengths_text_for(candidate_info)}
+    Match rate: {candidate_info['match_percentage']}%
+"""
+        for i, (candidate_info, jd_summary) in enumerate(invitations)
+    )
+    
+    prompt = f"""
+    Act as a professional recruiter writing interview invitations for {os.getenv("COMPANY_NAME", "Our Company")}. 
+    For each invitee below, write one short paragraph (2-3 sentences, under 60 words) telling 
+    them why they are a good fit for the role, highlighting 1-2 of their strengths. Address 
+    the candidate directly. Do not include a greeting, interview times or a sign-off.
+    
+{invitees}
+    Respond with ONLY a valid JSON array containing exactly one object per invitee, with 
+    "CandidateId" set to the invitee number shown above and "Paragraph" set to the paragraph.
+    """
+    
+    paragraphs = [None] * len(invitations)
+    try:
+        response = generate_content(model_registry.get(), prompt, json_generation_config(FIT_PARAGRAPH_BATCH_SCHEMA))
+        parsed = load_json(response_text_of(response), FIT_PARAGRAPH_BATCH_SCHEMA)
+    except Exception:
+        parsed = []
+    
+    for item in parsed if isinstance(parsed, list) else []:
+        errors = []
+        item = validate(item, FIT_PARAGRAPH_BATCH_SCHEMA["items"], "$", errors)
+        if errors or not item["Paragraph"]:
+            continue
+        candidate_id = item["CandidateId"]
+        if 0 <= candidate_id < len(invitations) and paragraphs[candidate_id] is None:
+            paragraphs[candidate_id] = " ".join(item["Paragraph"].split())
+    
+    for i, paragraph in enumerate(paragraphs):
+        if paragraph is None:
+            metrics.inc("fallbacks_total", stage="fit_paragraph")
+            paragraphs[i] = default_fit_paragraph(invitations[i][0])
+    return paragraphs
+
+# Interview Scheduler Agent. In template mode only the fit paragraph comes from the model;
+# otherwise the model writes the whole email.
+@metrics.instrument("email")
+def generate_interview_email(candidate_info, jd_summary):
+    if INVITATION_MODE == "template":
+        return render_invitation(candidate_info, jd_summary, generate_fit_paragraphs([(candidate_info, jd_summary)])[0])
+    
+    model = model_registry.get()
+    proposed_slots = proposed_interview_slots()
+    
+    job_title = jd_summary.get("JobTitle", "the open position")
+    company = os.getenv("COMPANY_NAME", "Our Company")
+    
+    prompt = f"""
+    Act as a professional recruiter. Write a personalized interview invitation email for {candidate_info['name']} 
+    who has been shortlisted for the {job_title} position at {company}.
+    
+    Candidate's strengths: {strengths_text_for(candidate_info)}
+    Match rate: {candidate_info['match_percentage']}%
+    
+    Include these proposed interview slots:
+    {', '.join(proposed_slots)}
+    
+    The email should:
+    1. Be professional and warm
+    2. Congratulate them on being shortlisted
+    3. Briefly mention why they're a good fit, highlighting 1-2 strengths
+    4. Propose the interview slots and ask for their preference
+    5. Mention the interview will be conducted via video call (Zoom)
+    6. Explain next steps and whom to contact with questions
+    
+    Respond with only the email text, no additional formatting or explanation.
+    """
+    
+    try:
+        response = generate_content(model, prompt)
+        email_text = response_text_of(response).strip()
+        
+        if email_text:
+            email_data = render_invitation(candidate_info, jd_summary, proposed_slots=proposed_slots)
+            email_data["email_body"] = email_text
+            return email_data
+        
+        # Fallback email if API fails
+        metrics.inc("fallbacks_total", stage="email")
+        return render_invitation(candidate_info, jd_summary, proposed_slots=proposed_slots)
+    except Exception as e:
+        return {"error": f"Failed to generate email: {str(e)}"}
+
+# Draft invitations for (candidate_info, jd_summary) pairs concurrently, keeping input order.
+# Model calls share the process-wide rate limiter. on_result(index, email_data) streams each
+# draft on the calling thread as it lands. In template mode candidates are drafted
+# INVITATION_BATCH_SIZE at a time, one fit-paragraph request per batch.
+def generate_interview_emails_concurrently(invitations, max_workers=None, on_event=None, on_result=None):
+    if INVITATION_MODE != "template":
+        return run_concurrently(
+            "email", lambda invitation: generate_interview_email(*invitation),
+            invitations, max_workers, on_event, on_result
+        )
+    
+    batch_size = max(1, INVITATION_BATCH_SIZE)
+    batches = [
+        list(range(start, min(start + batch_size, len(invitations))))
+        for start in range(0, len(invitations), batch_size)
+    ]
+    emails = [None] * len(invitations)
+    
+    def run_batch(index, batch, publish):
+        for i in batch:
+            publish(progress_event("email", STARTED, i))
+        
+        start = time.perf_counter()
+        paragraphs = generate_fit_paragraphs([invitations[i] for i in batch])
+        batch_emails = [render_invitation(*invitations[i], paragraph) for i, paragraph in zip(batch, paragraphs)]
+        latency = time.perf_counter() - start
+        
+        for i in batch:
+            publish(progress_event("email", COMPLETED, i, latency))
+        return batch_emails
+    
+    def record(index, batch_emails):
+        for i, email_data in zip(batches[index], batch_emails):
+            emails[i] = email_data
+            if on_result:
+                on_result(i, email_data)
+    
+    run_in_pool(run_batch, batches, max_workers, on_event, record)
+    return emails
+
+# Function to create a mailto link for email
+def generate_mailto_link(email_data):
+    try:
+        recipient = email_data['candidate_email']
+        subject = email_data['email_subject']
+        body = email_data['email_body']
+        
+        # URL encode the subject and body for the mailto link
+        import urllib.parse
+        subject_encoded = urllib.parse.quote(subject)
+        body_encoded = urllib.parse.quote(body)
+        
+        # Create the mailto link
+        mailto_link = f"mailto:{recipient}?subject={subject_encoded}&body={body_encoded}"
+        
+        return {
+            "status": "success",
+            "mailto_link": mailto_link,
+            "message": f"Email ready to send to {recipient}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error generating email link: {str(e)}"
+        }
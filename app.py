@@ -1,442 +1,55 @@
 import streamlit as st
-import time
-import google.generativeai as genai
-import os
-import PyPDF2 as pdf
-from dotenv import load_dotenv
-import json
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
-import random
-import pandas as pd
-import io
 import base64
-import re
-
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini AI
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-# Function to extract text from PDF
-def input_pdf_text(uploaded_file):
-    try:
-        reader = pdf.PdfReader(uploaded_file)
-        text = ""
-        for page in reader.pages:
-            extracted_text = page.extract_text() or ""  # Handle None case
-            text += extracted_text
-        
-        if not text.strip():
-            # If no text was extracted (possibly an image-based PDF)
-            return "This appears to be an image-based PDF. Please provide a text-based PDF or manually enter the content."
-            
-        return text.strip()
-    except Exception as e:
-        return f"Error extracting text from PDF: {str(e)}"
-
-# Function to read job description from CSV
+import time
 import pandas as pd
+import uuid
 
-def read_jd_from_csv(uploaded_file): 
-    try:
-        df = pd.read_csv(uploaded_file)
-
-        if df.empty:
-            return "The CSV file is empty."
-
-        # Look for job description column
-        jd_columns = ['job_description', 'jobdescription', 'description', 'jd', 'job', 'text', 'Job Description']
-        jd_column = next((col for col in jd_columns if col in df.columns), None)
-
-        if jd_column is None:
-            return "No recognizable job description column found."
-
-        # Look for job title column
-        title_columns = ['job_title', 'title', 'position', 'Job Title']
-        title_column = next((col for col in title_columns if col in df.columns), None)
-
-        if title_column is None:
-            return "No recognizable job title column found."
-
-        # Extract and format
-        formatted_descriptions = []
-        for i, row in df[[title_column, jd_column]].dropna().iterrows():
-            title = str(row[title_column]).strip()
-            desc = str(row[jd_column]).strip()
-            formatted_descriptions.append(f"---\n**{title}:**\n{desc}\n")
-
-        return "\n".join(formatted_descriptions)
-
-    except Exception as e:
-        return f"Error reading CSV file: {str(e)}"
-
-
-
-# Job Description Summarizer Agent
-def summarize_job_description(jd_text):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    prompt = f"""
-    Act as an expert job description analyzer. Review the following job description and extract 
-    key elements in a structured format.
-    
-    Job Description: {jd_text}
-    
-    Respond with a valid JSON object containing these fields:
-    {{
-      "JobTitle": "title here",
-      "Department": "department name",
-      "Location": "location",
-      "EmploymentType": "full-time/part-time/contract",
-      "RequiredSkills": ["skill1", "skill2", "..."],
-      "RequiredExperience": "X years in...",
-      "RequiredQualifications": ["qualification1", "qualification2", "..."],
-      "Responsibilities": ["responsibility1", "responsibility2", "..."],
-      "SalaryRange": "range if mentioned",
-      "PreferredSkills": ["skill1", "skill2", "..."]
-    }}
-    
-    Important: Only respond with the JSON object and nothing else. No explanations or markdown formatting.
-    """
-    
-    try:
-        response = model.generate_content(prompt)
-        
-        if response and hasattr(response, 'text'):
-            # Clean the response text
-            response_text = response.text.strip()
-            
-            # Handle different response formats
-            if response_text.startswith("```json") and response_text.endswith("```"):
-                response_text = response_text[7:-3].strip()
-            elif response_text.startswith("```") and response_text.endswith("```"):
-                response_text = response_text[3:-3].strip()
-            
-            # If the response still contains markdown or non-JSON text, try to extract JSON portion
-            if not response_text.startswith("{"):
-                # Look for JSON object in the response
-                start_index = response_text.find("{")
-                end_index = response_text.rfind("}")
-                
-                if start_index >= 0 and end_index >= 0:
-                    response_text = response_text[start_index:end_index+1]
-            
-            # Try to parse as JSON
-            try:
-                return json.loads(response_text)
-            except json.JSONDecodeError as json_err:
-                # If direct parsing fails, try a fallback approach
-                return {
-                    "JobTitle": extract_field_from_text(response_text, "JobTitle") or "Data Analyst",
-                    "Department": extract_field_from_text(response_text, "Department") or "Not specified",
-                    "Location": extract_field_from_text(response_text, "Location") or "Not specified",
-                    "EmploymentType": extract_field_from_text(response_text, "EmploymentType") or "Full-time",
-                    "RequiredSkills": extract_list_from_text(response_text, "RequiredSkills") or ["Python", "Data Analysis"],
-                    "RequiredExperience": extract_field_from_text(response_text, "RequiredExperience") or "2+ years",
-                    "RequiredQualifications": extract_list_from_text(response_text, "RequiredQualifications") or ["Bachelor's degree"],
-                    "Responsibilities": extract_list_from_text(response_text, "Responsibilities") or ["Data Analysis", "Reporting"],
-                    "SalaryRange": extract_field_from_text(response_text, "SalaryRange") or "Not specified",
-                    "PreferredSkills": extract_list_from_text(response_text, "PreferredSkills") or []
-                }
-        else:
-            return {"error": "Failed to get a valid response from the API"}
-            
-    except Exception as e:
-        return {"error": f"Failed to process the JD: {str(e)}"}
-
-# Helper functions to extract info from text if JSON parsing fails
-def extract_field_from_text(text, field_name):
-    if not text:
-        return None
-    
-    # Try to find field in format "field_name": "value"
-    import re
-    pattern = f'"{field_name}"\\s*:\\s*"([^"]*)"'
-    match = re.search(pattern, text)
-    if match:
-        return match.group(1)
-    return None
-
-def extract_list_from_text(text, field_name):
-    if not text:
-        return None
-    
-    # Try to find field in format "field_name": ["value1", "value2"]
-    import re
-    pattern = f'"{field_name}"\\s*:\\s*\\[(.*?)\\]'
-    match = re.search(pattern, text)
-    if match:
-        items_text = match.group(1)
-        # Extract individual items
-        items = re.findall(r'"([^"]*)"', items_text)
-        return items
-    return None
-
-# Recruiting Agent for CV Analysis
-def analyze_cv(cv_text, jd_summary):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    # Format JD summary for the prompt
-    required_skills = ", ".join(jd_summary.get("RequiredSkills", []))
-    preferred_skills = ", ".join(jd_summary.get("PreferredSkills", []))
-    responsibilities = ", ".join(jd_summary.get("Responsibilities", []))
-    qualifications = ", ".join(jd_summary.get("RequiredQualifications", []))
-    
-    prompt = f"""
-    Act as a senior recruiting agent specializing in talent acquisition. Analyze this candidate's 
-    resume against the job requirements and provide a detailed evaluation.
-    
-    Job Title: {jd_summary.get("JobTitle", "Not specified")}
-    Required Skills: {required_skills}
-    Preferred Skills: {preferred_skills}
-    Required Experience: {jd_summary.get("RequiredExperience", "Not specified")}
-    Required Qualifications: {qualifications}
-    Key Responsibilities: {responsibilities}
-    
-    Candidate Resume: {cv_text}
-    
-    Respond with ONLY a valid JSON object containing:
-    {{
-      "CandidateName": "full name",
-      "ContactInfo": "email and/or phone",
-      "Skills": ["skill1", "skill2", "..."],
-      "Experience": ["experience1", "experience2", "..."],
-      "Education": ["education1", "education2", "..."],
-      "Certifications": ["cert1", "cert2", "..."],
-      "SkillMatch": "X%",
-      "ExperienceMatch": "X%",
-      "QualificationMatch": "X%",
-      "OverallMatch": "X%",
-      "MatchedSkills": ["skill1", "skill2", "..."],
-      "MissingSkills": ["skill1", "skill2", "..."],
-      "Strengths": ["strength1", "strength2", "..."],
-      "Areas_for_Improvement": ["area1", "area2", "..."],
-      "Recommendation": "shortlist/reject/further review"
-    }}
-    
-    Important: Only provide the JSON object. No additional text, no markdown formatting.
-    """
-    
-    try:
-        response = model.generate_content(prompt)
-        
-        if response and hasattr(response, 'text'):
-            # Clean the response text
-            response_text = response.text.strip()
-            
-            # Handle different response formats
-            if response_text.startswith("```json") and response_text.endswith("```"):
-                response_text = response_text[7:-3].strip()
-            elif response_text.startswith("```") and response_text.endswith("```"):
-                response_text = response_text[3:-3].strip()
-            
-            # If the response still contains non-JSON text, try to extract JSON portion
-            if not response_text.startswith("{"):
-                start_index = response_text.find("{")
-                end_index = response_text.rfind("}")
-                
-                if start_index >= 0 and end_index >= 0:
-                    response_text = response_text[start_index:end_index+1]
-            
-            # Create a fallback response if parsing fails
-            try:
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                # Extract name from resume if possible
-                candidate_name = "Unknown Candidate"
-                name_match = re.search(r"([A-Z][a-z]+ [A-Z][a-z]+)", cv_text[:500])
-                if name_match:
-                    candidate_name = name_match.group(1)
-                
-                # Extract email if possible
-                contact_info = "Not found"
-                email_match = re.search(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", cv_text)
-                if email_match:
-                    contact_info = email_match.group(0)
-                
-                return {
-                    "CandidateName": candidate_name,
-                    "ContactInfo": contact_info,
-                    "Skills": ["Unable to parse skills"],
-                    "Experience": ["Experience details not parsed"],
-                    "Education": ["Education details not parsed"],
-                    "Certifications": [],
-                    "SkillMatch": "0%",
-                    "ExperienceMatch": "0%",
-                    "QualificationMatch": "0%",
-                    "OverallMatch": "50%",
-                    "MatchedSkills": [],
-                    "MissingSkills": jd_summary.get("RequiredSkills", []),
-                    "Strengths": ["Unable to determine strengths"],
-                    "Areas_for_Improvement": ["Resume parsing failed, please review manually"],
-                    "Recommendation": "further review"
-                }
-        else:
-            return {"error": "Failed to get a valid response from the API for CV analysis"}
-            
-    except Exception as e:
-        return {"error": f"Failed to analyze CV: {str(e)}"}
-
-# Candidate Shortlisting Agent
-def shortlist_candidates(candidates_analysis, threshold=70):
-    shortlisted = []
-    
-    for candidate in candidates_analysis:
-        # Skip entries with errors
-        if "error" in candidate:
-            continue
-            
-        # Extract match percentage
-        match_percentage = int(candidate.get("OverallMatch", "0%").strip("%"))
-        
-        if match_percentage >= threshold:
-            shortlisted.append({
-                "name": candidate.get("CandidateName", "Unknown"),
-                "contact": candidate.get("ContactInfo", "Not provided"),
-                "match_percentage": match_percentage,
-                "strengths": candidate.get("Strengths", []),
-                "missing_skills": candidate.get("MissingSkills", []),
-                "recommendation": candidate.get("Recommendation", "")
-            })
-    
-    # Sort by match percentage (highest first)
-    shortlisted.sort(key=lambda x: x["match_percentage"], reverse=True)
-    return shortlisted
-
-# Interview Scheduler Agent
-def generate_interview_email(candidate_info, jd_summary):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    # Generate interview dates (next business days)
-    today = datetime.now()
-    proposed_dates = []
-    
-    for i in range(1, 8):
-        next_date = today + timedelta(days=i)
-        # Skip weekends (5 = Saturday, 6 = Sunday)
-        if next_date.weekday() < 5:
-            proposed_dates.append(next_date.strftime("%A, %B %d, %Y"))
-            if len(proposed_dates) == 3:  # Get 3 business days
-                break
-    
-    # Generate interview times
-    interview_times = ["10:00 AM", "11:30 AM", "2:00 PM", "3:30 PM"]
-    proposed_slots = [f"{date} at {time}" for date in proposed_dates for time in random.sample(interview_times, 2)]
-    
-    job_title = jd_summary.get("JobTitle", "the open position")
-    company = os.getenv("COMPANY_NAME", "Our Company")
-    
-    # Handle missing strengths
-    candidate_strengths = candidate_info.get('strengths', [])
-    if not candidate_strengths or len(candidate_strengths) == 0:
-        candidate_strengths = ["qualifications", "experience"]
-    
-    strengths_text = ', '.join(candidate_strengths[:3]) if len(candidate_strengths) > 0 else "qualifications"
-    
-    prompt = f"""
-    Act as a professional recruiter. Write a personalized interview invitation email for {candidate_info['name']} 
-    who has been shortlisted for the {job_title} position at {company}.
-    
-    Candidate's strengths: {strengths_text}
-    Match rate: {candidate_info['match_percentage']}%
-    
-    Include these proposed interview slots:
-    {', '.join(proposed_slots[:5])}
-    
-    The email should:
-    1. Be professional and warm
-    2. Congratulate them on being shortlisted
-    3. Briefly mention why they're a good fit, highlighting 1-2 strengths
-    4. Propose the interview slots and ask for their preference
-    5. Mention the interview will be conducted via video call (Zoom)
-    6. Explain next steps and whom to contact with questions
-    
-    Respond with only the email text, no additional formatting or explanation.
-    """
-    
-    try:
-        response = model.generate_content(prompt)
-        
-        if response and hasattr(response, 'text'):
-            email_text = response.text.strip()
-            
-            return {
-                "candidate_name": candidate_info['name'],
-                "candidate_email": candidate_info['contact'],
-                "email_subject": f"Interview Invitation: {job_title} position at {company}",
-                "email_body": email_text,
-                "proposed_slots": proposed_slots[:5]
-            }
-        else:
-            # Fallback email if API fails
-            default_email = f"""
-Dear {candidate_info['name']},
-
-Congratulations! We are pleased to inform you that you have been shortlisted for the {job_title} position at {company}.
-
-We were impressed with your profile and would like to invite you for a video interview to discuss your experience and the role in more detail.
-
-Please let us know which of the following time slots would work best for you:
-- {proposed_slots[0]}
-- {proposed_slots[1]}
-- {proposed_slots[2]}
-
-The interview will be conducted via Zoom, and we will send you the meeting details once you confirm your preferred time slot.
-
-If you have any questions, please don't hesitate to contact us.
-
-We look forward to speaking with you soon!
-
-Best regards,
-Recruiting Team
-{company}
-            """
-            
-            return {
-                "candidate_name": candidate_info['name'],
-                "candidate_email": candidate_info['contact'],
-                "email_subject": f"Interview Invitation: {job_title} position at {company}",
-                "email_body": default_email,
-                "proposed_slots": proposed_slots[:5]
-            }
-    except Exception as e:
-        return {"error": f"Failed to generate email: {str(e)}"}
-
-# Function to create a mailto link for email
-def generate_mailto_link(email_data):
-    try:
-        recipient = email_data['candidate_email']
-        subject = email_data['email_subject']
-        body = email_data['email_body']
-        
-        # URL encode the subject and body for the mailto link
-        import urllib.parse
-        subject_encoded = urllib.parse.quote(subject)
-        body_encoded = urllib.parse.quote(body)
-        
-        # Create the mailto link
-        mailto_link = f"mailto:{recipient}?subject={subject_encoded}&body={body_encoded}"
-        
-        return {
-            "status": "success",
-            "mailto_link": mailto_link,
-            "message": f"Email ready to send to {recipient}"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Error generating email link: {str(e)}"
-        }
+from agents import (
+    analysis_cache, analyze_cv_matrix, build_match_matrix, compaction_stats, generate_interview_email,
+    generate_interview_emails_concurrently, generate_mailto_link, input_pdf_text, prefix_cache, rate_limiter, read_jd_from_csv, read_jobs_from_csv,
+    shortlist_candidates, summarize_job_description, summarize_jobs_concurrently
+)
+from checkpoint import RunCheckpoint, candidate_ids_for, make_run_id
+from config import (
+    CACHE_DB_PATH, CANDIDATES_PER_PAGE, DUPLICATE_SIMILARITY, EMAIL_ADDRESS, EMAIL_MAX_RETRIES, EMAIL_PASSWORD,
+    EMAILS_PER_MINUTE, MAX_CONCURRENT_ANALYSES, MAX_PDF_CHARS, MAX_PDF_PAGES, METRICS_FILE, METRICS_PORT,
+    PDF_EXTRACTION_WORKERS, SMTP_HOST, SMTP_PORT, SMTP_USE_TLS, STORE_DB_PATH
+)
+from duplicates import group_duplicates
+from extraction import extract_pdf_texts, has_resume_text
+from mailer import (
+    DELIVERY_FAILED, QUEUED, SENT, UNDELIVERABLE, DeliveryQueue, build_invitation_message, recipient_address
+)
+from metrics import metrics
+from progress import ProgressTracker, run_with_events
+from screening import compute_similarity_matrix
+from store import CandidateStore
 
 # Function to get image as base64 for embedded display
 def get_base64_encoded_image(image_path):
     with open(image_path, "rb") as img_file:
         return base64.b64encode(img_file.read()).decode()
 
+# Runs, candidates, analyses and shortlists, shared across reruns and sessions
+@st.cache_resource(show_spinner=False)
+def get_candidate_store():
+    return CandidateStore(STORE_DB_PATH)
+
+# Invitation delivery over one pooled SMTP connection; each message's status is written to
+# the store as it is queued, sent or fails
+@st.cache_resource(show_spinner=False)
+def get_delivery_queue():
+    store = get_candidate_store()
+    return DeliveryQueue(
+        SMTP_HOST, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, SMTP_USE_TLS, EMAILS_PER_MINUTE, EMAIL_MAX_RETRIES,
+        on_status=lambda key, status, error: store.set_interview_status(*key, status, error)
+    )
+
+# Local /metrics endpoint, started once per process
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(port):
+    return metrics.serve(port)
+
 # Page configuration
 st.set_page_config(
     page_title="EzHunt | Smart Recruitment Assistant",
@@ -445,6 +58,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+candidate_store = get_candidate_store()
+delivery_queue = get_delivery_queue()
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
 # Custom CSS 
 st.markdown("""
 <style>
@@ -867,16 +485,25 @@ if 'jd_text' not in st.session_state:
     st.session_state.jd_text = ""
 if 'jd_summary' not in st.session_state:
     st.session_state.jd_summary = None
-if 'candidates' not in st.session_state:
-    st.session_state.candidates = []
-if 'analysis_results' not in st.session_state:
-    st.session_state.analysis_results = []
-if 'shortlisted' not in st.session_state:
-    st.session_state.shortlisted = []
 if 'selected_candidate' not in st.session_state:
     st.session_state.selected_candidate = None
-if 'interview_email' not in st.session_state:
-    st.session_state.interview_email = None
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = []
+if 'job_summaries' not in st.session_state:
+    st.session_state.job_summaries = []
+if 'active_job' not in st.session_state:
+    st.session_state.active_job = 0
+# Candidates, analyses and the shortlist live in the candidate store under this run ID
+if 'run_id' not in st.session_state:
+    st.session_state.run_id = None
+if 'checkpoint_id' not in st.session_state:
+    st.session_state.checkpoint_id = None
+if 'review_candidate' not in st.session_state:
+    st.session_state.review_candidate = None
+if 'candidate_page' not in st.session_state:
+    st.session_state.candidate_page = 0
+if 'candidate_filters' not in st.session_state:
+    st.session_state.candidate_filters = None
 
 # Functions to navigate steps
 def go_to_step(step):
@@ -889,6 +516,175 @@ def prev_step():
     if st.session_state.current_step > 1:
         st.session_state.current_step -= 1
 
+# Render pipeline progress events as a progress bar plus a per-stage status line
+def progress_renderer(tracker):
+    progress_bar = st.progress(0)
+    status = st.empty()
+    
+    def handle(event):
+        tracker.record(event)
+        progress_bar.progress(tracker.fraction())
+        status.caption(" | ".join(tracker.stage_summary(stage) for stage in tracker.totals))
+    
+    return handle
+
+# Switch the job whose results Steps 3-5 display
+def select_job(index):
+    st.session_state.active_job = index
+    st.session_state.jd_summary = st.session_state.job_summaries[index]
+
+# Checkpoint for screening these resumes against the current jobs. The checkpoint ID only
+# depends on the inputs, so processing the same resumes again after a reload resumes the
+# analyses. The store run belongs to this session: it is kept while the inputs stay the same
+# (so the shortlist survives re-processing) and replaced by a fresh ID when they change.
+def run_checkpoint_for(cv_texts):
+    candidate_ids = candidate_ids_for(cv_texts)
+    checkpoint_id = make_run_id(st.session_state.job_summaries, candidate_ids)
+    if st.session_state.run_id is None or st.session_state.checkpoint_id != checkpoint_id:
+        st.session_state.run_id = uuid.uuid4().hex[:16]
+        st.session_state.checkpoint_id = checkpoint_id
+    return RunCheckpoint(CACHE_DB_PATH, checkpoint_id), candidate_ids
+
+# Score the current run's candidates again from scratch: the checkpoint is discarded and
+# cached analyses are ignored, so every pair goes back to the model
+def rerun_analysis():
+    candidate_ids, cv_texts = candidate_store.candidate_texts(st.session_state.run_id)
+    checkpoint = RunCheckpoint(CACHE_DB_PATH, st.session_state.checkpoint_id)
+    checkpoint.clear()
+    
+    on_event = progress_renderer(ProgressTracker({
+        "analysis": len(cv_texts) * len(st.session_state.job_summaries)
+    }))
+    similarity = []
+    for j in range(len(st.session_state.job_summaries)):
+        scores = candidate_store.similarity(st.session_state.run_id, j)
+        similarity.append([scores.get(candidate_id, 0.0) for candidate_id in candidate_ids])
+    
+    analysis_matrix = analyze_cv_matrix(
+        cv_texts,
+        st.session_state.job_summaries,
+        on_event=on_event,
+        similarity=similarity,
+        checkpoint=checkpoint,
+        candidate_ids=candidate_ids,
+        refresh=True
+    )
+    candidate_store.save_analyses(st.session_state.run_id, analysis_matrix, candidate_ids)
+
+# Whether the active job has results for the current run; pages load what they render
+def has_results():
+    return bool(st.session_state.run_id) and candidate_store.analysis_count(
+        st.session_state.run_id, st.session_state.active_job
+    ) > 0
+
+def current_shortlist():
+    return candidate_store.shortlist(st.session_state.run_id) if st.session_state.run_id else []
+
+def job_title_for(index):
+    return st.session_state.job_summaries[index].get("JobTitle", f"Job {index+1}")
+
+# Job selector shown when several CSV jobs were scored
+def render_job_selector():
+    if len(st.session_state.job_summaries) > 1:
+        selected_job = st.selectbox(
+            "Job",
+            range(len(st.session_state.job_summaries)),
+            index=st.session_state.active_job,
+            format_func=job_title_for
+        )
+        if selected_job != st.session_state.active_job:
+            select_job(selected_job)
+
+# Step 4 sort options and the store ordering behind each
+SORT_ORDERS = {
+    "Match % (High to Low)": "match_desc",
+    "Match % (Low to High)": "match_asc",
+    "Similarity (High to Low)": "similarity_desc",
+    "Name (A-Z)": "name"
+}
+
+# One page of the active job's candidates, filtered and sorted by the store. Changing the
+# filters goes back to the first page; a page past the end moves to the last one.
+def load_candidate_page(order, **filters):
+    if st.session_state.candidate_filters != (order, filters):
+        st.session_state.candidate_filters = (order, filters)
+        st.session_state.candidate_page = 0
+    
+    total, rows = candidate_store.candidate_page(
+        st.session_state.run_id, st.session_state.active_job, order,
+        offset=st.session_state.candidate_page * CANDIDATES_PER_PAGE, limit=CANDIDATES_PER_PAGE, **filters
+    )
+    pages = max(1, -(-total // CANDIDATES_PER_PAGE))
+    if st.session_state.candidate_page >= pages:
+        st.session_state.candidate_page = pages - 1
+        return load_candidate_page(order, **filters)
+    return total, pages, rows
+
+# Page buttons update the page before the rerun, so the list and the buttons agree
+def turn_page(step):
+    st.session_state.candidate_page += step
+
+# Job summary a shortlisted candidate was scored against
+def job_summary_for(candidate):
+    job_index = candidate.get("job_index", 0)
+    if job_index < len(st.session_state.job_summaries):
+        return st.session_state.job_summaries[job_index]
+    return st.session_state.jd_summary
+
+# Display name for a shortlisted candidate, including the job when several are loaded
+def shortlist_label(candidate):
+    if len(st.session_state.job_summaries) > 1:
+        return f"{candidate['name']} · {job_summary_for(candidate).get('JobTitle', 'Unknown job')}"
+    return candidate["name"]
+
+# Stored invitation status of a candidate. The delivery queue lives in memory, so a Queued
+# row whose message is no longer pending (after a restart) counts as not sent.
+def interview_status(candidate, interview):
+    key = (st.session_state.run_id, candidate["job_index"], candidate["candidate_id"])
+    if interview["status"] == QUEUED and not delivery_queue.is_pending(key):
+        return "Email Generated"
+    return interview["status"]
+
+# Queue a candidate's generated invitation for SMTP delivery; False if it is already queued
+# or the contact details hold no email address (the invitation is marked Undeliverable)
+def send_invitation(candidate, email_data):
+    key = (st.session_state.run_id, candidate["job_index"], candidate["candidate_id"])
+    if not recipient_address(email_data):
+        candidate_store.set_interview_status(*key, UNDELIVERABLE, "No email address in the contact details")
+        return False
+    return delivery_queue.enqueue(key, build_invitation_message(email_data, EMAIL_ADDRESS))
+
+# Status stored with a newly generated (or failed) draft. A candidate who was already invited
+# stays Sent, so a fresh draft never puts them back in the Send All queue.
+def draft_status(interview, status):
+    if interview and interview["status"] == SENT:
+        return SENT
+    return status
+
+# Calls, error rate and latency per pipeline stage since the process started
+def stage_diagnostics():
+    calls = {}
+    for labels, count in metrics.counters("stage_calls_total").items():
+        labels = dict(labels)
+        stage_calls = calls.setdefault(labels["stage"], {"ok": 0, "error": 0})
+        stage_calls[labels["outcome"]] += count
+    
+    rows = []
+    for labels, summary in sorted(metrics.histogram_summary("stage_duration_seconds").items()):
+        stage = dict(labels)["stage"]
+        outcomes = calls.get(stage, {"ok": 0, "error": 0})
+        total = outcomes["ok"] + outcomes["error"]
+        rows.append({
+            "Stage": stage,
+            "Calls": total,
+            "Errors": outcomes["error"],
+            "Error %": round(100 * outcomes["error"] / total, 1) if total else 0.0,
+            "Mean (s)": round(summary["mean"], 3),
+            "p50 (s)": summary["p50"],
+            "p95 (s)": summary["p95"]
+        })
+    return pd.DataFrame(rows)
+
 # Header
 st.markdown('<div class="main-header"><div class="logo-container">🎯 <span class="logo-text">EzHunt</div><p>AI-Powered Recruitment Assistant</p></div>', unsafe_allow_html=True)
 
@@ -940,7 +736,7 @@ with st.sidebar:
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-label">Candidates</div>
-            <div class="stat-number">{len(st.session_state.candidates)}</div>
+            <div class="stat-number">{candidate_store.candidate_count(st.session_state.run_id) if st.session_state.run_id else 0}</div>
         </div>
         """, unsafe_allow_html=True)
     
@@ -948,10 +744,46 @@ with st.sidebar:
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-label">Shortlisted</div>
-            <div class="stat-number">{len(st.session_state.shortlisted)}</div>
+            <div class="stat-number">{len(current_shortlist())}</div>
         </div>
         """, unsafe_allow_html=True)
     
+    with st.expander("Diagnostics"):
+        stages = stage_diagnostics()
+        if stages.empty:
+            st.caption("No pipeline calls yet")
+        else:
+            st.dataframe(stages, hide_index=True, use_container_width=True)
+        
+        render_times = metrics.histogram_summary("step_render_seconds")
+        if render_times:
+            st.caption("Step render (mean / p95): " + " · ".join(
+                f"{dict(labels)['step']}: {summary['mean']:.2f}s / {summary['p95']}s"
+                for labels, summary in sorted(render_times.items())
+            ))
+        
+        repairs = {dict(labels)["outcome"]: count for labels, count in metrics.counters("json_repairs_total").items()}
+        st.caption(f"JSON repairs: {repairs.get('fixed', 0)} fixed · {repairs.get('failed', 0)} failed")
+        fallbacks = {dict(labels)["stage"]: count for labels, count in metrics.counters("fallbacks_total").items()}
+        if fallbacks:
+            st.caption("Fallbacks: " + " · ".join(f"{stage} {count}" for stage, count in sorted(fallbacks.items())))
+        
+        cache_stats = analysis_cache.stats()
+        st.caption(f"Analysis cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['entries']} stored")
+        prefix_stats = prefix_cache.stats()
+        st.caption(f"Job prefix reuse: {prefix_stats['hits']} reused · {prefix_stats['misses']} built · {prefix_stats['remote_entries']} server-cached")
+        limiter_stats = rate_limiter.stats()
+        st.caption(f"Gemini rate limit: {limiter_stats['retries']} retries · {limiter_stats['throttled_seconds']}s throttled")
+        st.caption(
+            f"Prompt tokens (est.): {limiter_stats['input_tokens']:,} in · {limiter_stats['output_tokens']:,} out · "
+            f"{limiter_stats['tokens_per_call']:,} per request"
+        )
+        resume_stats = compaction_stats.stats()
+        st.caption(
+            f"Resume compaction: {resume_stats['tokens_saved']:,} tokens saved ({resume_stats['saved_percent']}%) "
+            f"across {resume_stats['resumes']} resumes · {resume_stats['trimmed']} trimmed to budget"
+        )
+    
     # Tips
     st.markdown("### Tips")
     tips = [
@@ -976,6 +808,10 @@ with st.sidebar:
     Need help? Contact support@ezhunt.com [Eg.]
     """)
 
+# Timed per step; a rerun triggered mid-step stops the script before the timing is recorded
+render_step = st.session_state.current_step
+render_start = time.perf_counter()
+
 # Main content area based on current step
 if st.session_state.current_step == 1:
     st.markdown("## Step 1: Import Job Description")
@@ -993,8 +829,15 @@ if st.session_state.current_step == 1:
             # Extract text based on file type
             if uploaded_file.name.endswith('.pdf'):
                 st.session_state.jd_text = input_pdf_text(uploaded_file)
+                st.session_state.jobs = []
             elif uploaded_file.name.endswith('.csv'):
                 st.session_state.jd_text = read_jd_from_csv(uploaded_file)
+                
+                # Each CSV row is summarized and scored as its own job
+                uploaded_file.seek(0)
+                st.session_state.jobs = read_jobs_from_csv(uploaded_file).get("jobs", [])
+                if len(st.session_state.jobs) > 1:
+                    st.info(f"{len(st.session_state.jobs)} jobs found. Each job will be summarized and scored separately.")
             
             # Show preview
             with st.expander("Preview Job Description", expanded=True):
@@ -1009,6 +852,7 @@ if st.session_state.current_step == 1:
         if st.button("Use This Text"):
             if jd_input.strip():
                 st.session_state.jd_text = jd_input
+                st.session_state.jobs = []
                 st.success("Job description saved!")
             else:
                 st.error("Please enter job description text")
@@ -1173,6 +1017,7 @@ if st.session_state.current_step == 1:
         
         if st.button("Use This Example"):
             st.session_state.jd_text = example_jds[selected_example]
+            st.session_state.jobs = []
             st.success(f"Example job description for {selected_example} loaded!")
             
             # Show preview
@@ -1183,14 +1028,31 @@ if st.session_state.current_step == 1:
     if st.session_state.jd_text:
         if st.button("Analyze Job Description", type="primary"):
             with st.spinner("Analyzing job description..."):
-                # Display progress
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)
-                    progress_bar.progress(i + 1)
+                if len(st.session_state.jobs) > 1:
+                    # Display progress
+                    on_event = progress_renderer(ProgressTracker({"summarization": len(st.session_state.jobs)}))
+                    
+                    # Analyze each CSV job separately
+                    summaries = summarize_jobs_concurrently(st.session_state.jobs, on_event=on_event)
+                    st.session_state.job_summaries = [summary for summary in summaries if "error" not in summary]
+                    
+                    failed_jobs = len(summaries) - len(st.session_state.job_summaries)
+                    if failed_jobs and st.session_state.job_summaries:
+                        st.warning(f"{failed_jobs} job(s) could not be analyzed and were skipped.")
+                    
+                    st.session_state.jd_summary = (st.session_state.job_summaries or summaries)[0]
+                else:
+                    # Display progress
+                    on_event = progress_renderer(ProgressTracker({"summarization": 1}))
+                    
+                    # Analyze the JD
+                    st.session_state.jd_summary = run_with_events(
+                        "summarization", "job description", on_event,
+                        summarize_job_description, st.session_state.jd_text
+                    )
+                    st.session_state.job_summaries = [st.session_state.jd_summary]
                 
-                # Analyze the JD
-                st.session_state.jd_summary = summarize_job_description(st.session_state.jd_text)
+                st.session_state.active_job = 0
                 
                 # Show results
                 if "error" not in st.session_state.jd_summary:
@@ -1205,6 +1067,9 @@ if st.session_state.current_step == 1:
 elif st.session_state.current_step == 2:
     st.markdown("## Step 2: Upload Resumes")
     
+    if len(st.session_state.job_summaries) > 1:
+        st.info(f"{len(st.session_state.job_summaries)} jobs loaded. Every resume will be scored against each job.")
+    
     # Display JD summary
     if st.session_state.jd_summary:
         with st.expander("Job Description Summary", expanded=False):
@@ -1257,29 +1122,68 @@ elif st.session_state.current_step == 2:
             # Store the files for processing
             if st.button("Process Resumes", type="primary"):
                 with st.spinner("Extracting text from resumes..."):
-                    progress_bar = st.progress(0)
-                    increment = 100 / (len(uploaded_files) * 2)  # Split progress between extraction and analysis
-                    progress = 0
+                    # Progress is split between extraction and analysis; the analysis total is
+                    # known once duplicates are merged
+                    tracker = ProgressTracker({
+                        "extraction": len(uploaded_files),
+                        "analysis": len(uploaded_files) * len(st.session_state.job_summaries)
+                    })
+                    on_event = progress_renderer(tracker)
+                    
+                    # Extract text from all resumes in parallel worker processes
+                    extraction_results = extract_pdf_texts(
+                        [(file.name, file.getvalue()) for file in uploaded_files],
+                        max_workers=PDF_EXTRACTION_WORKERS,
+                        max_pages=MAX_PDF_PAGES,
+                        max_chars=MAX_PDF_CHARS,
+                        on_event=on_event
+                    )
+                    # The same resume sent several times (or nearly the same) is one candidate;
+                    # files without resume text are never merged
+                    groups = group_duplicates(
+                        [result["text"] for result in extraction_results], DUPLICATE_SIMILARITY,
+                        separate=[k for k, result in enumerate(extraction_results) if not has_resume_text(result)]
+                    )
+                    cv_texts = [extraction_results[group[0]]["text"] for group in groups]
+                    tracker.totals["analysis"] = len(groups) * len(st.session_state.job_summaries)
                     
-                    # Extract text from each resume
-                    cv_texts = []
-                    for i, file in enumerate(uploaded_files):
-                        cv_text = input_pdf_text(file)
-                        cv_texts.append(cv_text)
-                        progress += increment
-                        progress_bar.progress(min(int(progress), 100))
+                    # Rank resumes locally, then store the run with per-file timings for the review step
+                    similarity = compute_similarity_matrix(cv_texts, st.session_state.job_summaries)
+                    checkpoint, candidate_ids = run_checkpoint_for(cv_texts)
+                    candidate_store.save_run(st.session_state.run_id, st.session_state.job_summaries, [
+                        {
+                            "candidate_id": candidate_id,
+                            "name": extraction_results[group[0]]["name"],
+                            "text": cv_texts[i],
+                            "similarity": [job_similarity[i] for job_similarity in similarity],
+                            "extraction": [
+                                {
+                                    "file": extraction_results[k]["name"],
+                                    "pages": extraction_results[k]["pages"],
+                                    "characters": len(extraction_results[k]["text"]),
+                                    "seconds": round(extraction_results[k]["seconds"], 3),
+                                    "status": "Failed" if extraction_results[k]["error"] else "OK",
+                                    "duplicate_of": extraction_results[group[0]]["name"] if k != group[0] else ""
+                                }
+                                for k in group
+                            ]
+                        }
+                        for i, (candidate_id, group) in enumerate(zip(candidate_ids, groups))
+                    ])
                     
-                    # Analyze each resume
-                    analysis_results = []
-                    for i, cv_text in enumerate(cv_texts):
-                        result = analyze_cv(cv_text, st.session_state.jd_summary)
-                        analysis_results.append(result)
-                        progress += increment
-                        progress_bar.progress(min(int(progress), 100))
+                    # Score every resume against every job concurrently
+                    analysis_matrix = analyze_cv_matrix(
+                        cv_texts,
+                        st.session_state.job_summaries,
+                        on_event=on_event,
+                        similarity=similarity,
+                        checkpoint=checkpoint,
+                        candidate_ids=candidate_ids
+                    )
                     
-                    # Store results in session state
-                    st.session_state.candidates = cv_texts
-                    st.session_state.analysis_results = analysis_results
+                    # Store results; the session keeps only the run ID
+                    candidate_store.save_analyses(st.session_state.run_id, analysis_matrix, candidate_ids)
+                    select_job(st.session_state.active_job)
                     
                     # Show completion and move to next step
                     st.success("All resumes processed!")
@@ -1490,32 +1394,41 @@ elif st.session_state.current_step == 2:
         
         if st.button("Use Example Candidates"):
             with st.spinner("Processing example candidates..."):
-                # Generate progress bar
-                progress_bar = st.progress(0)
-                
                 # Get the selected number of examples
                 examples_list = list(example_candidates.values())[:num_examples]
                 
+                # Generate progress bar
+                on_event = progress_renderer(ProgressTracker({
+                    "analysis": len(examples_list) * len(st.session_state.job_summaries)
+                }))
+                
                 # Store example CV texts
                 cv_texts = [example["text"] for example in examples_list]
-                st.session_state.candidates = cv_texts
                 
-                # Analyze each resume
-                analysis_results = []
-                for i, cv_text in enumerate(cv_texts):
-                    # Update progress
-                    progress = int((i / len(cv_texts)) * 100)
-                    progress_bar.progress(progress)
-                    
-                    # Analyze CV
-                    result = analyze_cv(cv_text, st.session_state.jd_summary)
-                    analysis_results.append(result)
-                
-                # Complete progress bar
-                progress_bar.progress(100)
+                # Rank resumes locally, then score every resume against every job concurrently
+                similarity = compute_similarity_matrix(cv_texts, st.session_state.job_summaries)
+                checkpoint, candidate_ids = run_checkpoint_for(cv_texts)
+                candidate_store.save_run(st.session_state.run_id, st.session_state.job_summaries, [
+                    {
+                        "candidate_id": candidate_id,
+                        "name": example["name"],
+                        "text": example["text"],
+                        "similarity": [job_similarity[i] for job_similarity in similarity]
+                    }
+                    for i, (candidate_id, example) in enumerate(zip(candidate_ids, examples_list))
+                ])
+                analysis_matrix = analyze_cv_matrix(
+                    cv_texts,
+                    st.session_state.job_summaries,
+                    on_event=on_event,
+                    similarity=similarity,
+                    checkpoint=checkpoint,
+                    candidate_ids=candidate_ids
+                )
                 
                 # Store results and move to next step
-                st.session_state.analysis_results = analysis_results
+                candidate_store.save_analyses(st.session_state.run_id, analysis_matrix, candidate_ids)
+                select_job(st.session_state.active_job)
                 st.success(f"{num_examples} example candidates processed!")
                 next_step()
                 st.experimental_rerun()
@@ -1533,153 +1446,189 @@ elif st.session_state.current_step == 2:
 elif st.session_state.current_step == 3:
     st.markdown("## Step 3: Review Analysis")
     
-    if st.session_state.analysis_results:
+    if has_results():
+        render_job_selector()
+        
         st.markdown("### Candidate Analysis Results")
         
-        # Create tabs for each candidate
-        candidate_tabs = []
-        for i, result in enumerate(st.session_state.analysis_results):
-            if "error" in result:
-                tab_name = f"Candidate {i+1} (Error)"
-            else:
-                tab_name = result.get("CandidateName", f"Candidate {i+1}")
-            candidate_tabs.append(tab_name)
+        # Compact overview of every candidate; only the selected one is rendered in full
+        summary = candidate_store.analysis_summary(st.session_state.run_id, st.session_state.active_job)
+        labels = {
+            candidate_id: f"Candidate {position+1} (Error)" if match is None else (name or f"Candidate {position+1}")
+            for candidate_id, position, name, match, recommendation in summary
+        }
         
-        tabs = st.tabs(candidate_tabs)
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "#": position + 1,
+                        "Candidate": labels[candidate_id],
+                        "Overall Match": f"{match}%" if match is not None else "n/a",
+                        "Recommendation": (recommendation or "n/a").capitalize()
+                    }
+                    for candidate_id, position, name, match, recommendation in summary
+                ]
+            ),
+            use_container_width=True,
+            hide_index=True,
+            height=min(400, 38 + 35 * len(summary))
+        )
         
-        # Display analysis for each candidate
-        for i, (tab, result) in enumerate(zip(tabs, st.session_state.analysis_results)):
-            with tab:
-                if "error" in result:
-                    st.error(f"Error analyzing this resume: {result['error']}")
-                    continue
+        candidate_ids = list(labels)
+        selected_id = st.selectbox(
+            "Candidate",
+            candidate_ids,
+            index=candidate_ids.index(st.session_state.review_candidate) if st.session_state.review_candidate in labels else 0,
+            format_func=labels.get
+        )
+        st.session_state.review_candidate = selected_id
+        result = candidate_store.analysis(st.session_state.run_id, st.session_state.active_job, selected_id)
+        
+        if "error" in result:
+            st.error(f"Error analyzing this resume: {result['error']}")
+        else:
+            if result.get("PreScreened"):
+                st.info("Scored by the local skills pre-screen. This resume matched too few of the job's skills to be sent for AI analysis.")
+            
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                st.markdown(f"### {result.get('CandidateName', 'Unnamed Candidate')}")
+                st.markdown(f"**Contact:** {result.get('ContactInfo', 'Not available')}")
                 
-                col1, col2 = st.columns([2, 1])
+                # Match percentages
+                st.markdown("### Match Scores")
                 
-                with col1:
-                    st.markdown(f"### {result.get('CandidateName', 'Unnamed Candidate')}")
-                    st.markdown(f"**Contact:** {result.get('ContactInfo', 'Not available')}")
-                    
-                    # Match percentages
-                    st.markdown("### Match Scores")
-                    
-                    # Skills match
-                    skill_match = int(result.get('SkillMatch', '0%').strip('%'))
-                    st.markdown(f"**Skills Match:** {skill_match}%")
-                    skill_class = "match-high" if skill_match >= 70 else ("match-medium" if skill_match >= 50 else "match-low")
-                    st.markdown(f"""
-                    <div class="match-progress">
-                        <div class="match-progress-bar {skill_class}" style="width: {skill_match}%"></div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Experience match
-                    exp_match = int(result.get('ExperienceMatch', '0%').strip('%'))
-                    st.markdown(f"**Experience Match:** {exp_match}%")
-                    exp_class = "match-high" if exp_match >= 70 else ("match-medium" if exp_match >= 50 else "match-low")
-                    st.markdown(f"""
-                    <div class="match-progress">
-                        <div class="match-progress-bar {exp_class}" style="width: {exp_match}%"></div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Qualification match
-                    qual_match = int(result.get('QualificationMatch', '0%').strip('%'))
-                    st.markdown(f"**Qualification Match:** {qual_match}%")
-                    qual_class = "match-high" if qual_match >= 70 else ("match-medium" if qual_match >= 50 else "match-low")
-                    st.markdown(f"""
-                    <div class="match-progress">
-                        <div class="match-progress-bar {qual_class}" style="width: {qual_match}%"></div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Overall match
-                    overall_match = int(result.get('OverallMatch', '0%').strip('%'))
-                    st.markdown(f"**Overall Match:** {overall_match}%")
-                    overall_class = "match-high" if overall_match >= 70 else ("match-medium" if overall_match >= 50 else "match-low")
-                    st.markdown(f"""
-                    <div class="match-progress">
-                        <div class="match-progress-bar {overall_class}" style="width: {overall_match}%"></div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Recommendation
-                    recommendation = result.get('Recommendation', 'further review')
-                    st.markdown(f"**Recommendation:** {recommendation.capitalize()}")
+                # Skills match
+                skill_match = int(result.get('SkillMatch', '0%').strip('%'))
+                st.markdown(f"**Skills Match:** {skill_match}%")
+                skill_class = "match-high" if skill_match >= 70 else ("match-medium" if skill_match >= 50 else "match-low")
+                st.markdown(f"""
+                <div class="match-progress">
+                    <div class="match-progress-bar {skill_class}" style="width: {skill_match}%"></div>
+                </div>
+                """, unsafe_allow_html=True)
                 
-                with col2:
-                    # Skills section
-                    st.markdown("### Skills")
-                    
-                    # Matched skills
-                    st.markdown("**Matched Skills:**")
-                    matched_html = ""
-                    for skill in result.get('MatchedSkills', []):
-                        matched_html += f'<span class="keyword-pill matched-keyword">{skill}</span>'
-                    
-                    if not matched_html:
-                        matched_html = "<em>No matched skills</em>"
-                        
-                    st.markdown(f"<div>{matched_html}</div>", unsafe_allow_html=True)
-                    
-                    # Missing skills
-                    st.markdown("**Missing Skills:**")
-                    missing_html = ""
-                    for skill in result.get('MissingSkills', []):
-                        missing_html += f'<span class="keyword-pill missing-keyword">{skill}</span>'
+                # Experience match
+                exp_match = int(result.get('ExperienceMatch', '0%').strip('%'))
+                st.markdown(f"**Experience Match:** {exp_match}%")
+                exp_class = "match-high" if exp_match >= 70 else ("match-medium" if exp_match >= 50 else "match-low")
+                st.markdown(f"""
+                <div class="match-progress">
+                    <div class="match-progress-bar {exp_class}" style="width: {exp_match}%"></div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Qualification match
+                qual_match = int(result.get('QualificationMatch', '0%').strip('%'))
+                st.markdown(f"**Qualification Match:** {qual_match}%")
+                qual_class = "match-high" if qual_match >= 70 else ("match-medium" if qual_match >= 50 else "match-low")
+                st.markdown(f"""
+                <div class="match-progress">
+                    <div class="match-progress-bar {qual_class}" style="width: {qual_match}%"></div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Overall match
+                overall_match = int(result.get('OverallMatch', '0%').strip('%'))
+                st.markdown(f"**Overall Match:** {overall_match}%")
+                overall_class = "match-high" if overall_match >= 70 else ("match-medium" if overall_match >= 50 else "match-low")
+                st.markdown(f"""
+                <div class="match-progress">
+                    <div class="match-progress-bar {overall_class}" style="width: {overall_match}%"></div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Recommendation
+                recommendation = result.get('Recommendation', 'further review')
+                st.markdown(f"**Recommendation:** {recommendation.capitalize()}")
+            
+            with col2:
+                # Skills section
+                st.markdown("### Skills")
+                
+                # Matched skills
+                st.markdown("**Matched Skills:**")
+                matched_html = ""
+                for skill in result.get('MatchedSkills', []):
+                    matched_html += f'<span class="keyword-pill matched-keyword">{skill}</span>'
+                
+                if not matched_html:
+                    matched_html = "<em>No matched skills</em>"
                     
-                    if not missing_html:
-                        missing_html = "<em>No missing skills</em>"
-                        
-                    st.markdown(f"<div>{missing_html}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div>{matched_html}</div>", unsafe_allow_html=True)
                 
-                # Strengths and Areas for Improvement
+                # Missing skills
+                st.markdown("**Missing Skills:**")
+                missing_html = ""
+                for skill in result.get('MissingSkills', []):
+                    missing_html += f'<span class="keyword-pill missing-keyword">{skill}</span>'
+                
+                if not missing_html:
+                    missing_html = "<em>No missing skills</em>"
+                    
+                st.markdown(f"<div>{missing_html}</div>", unsafe_allow_html=True)
+            
+            # Strengths and Areas for Improvement
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("### Strengths")
+                strengths = result.get('Strengths', [])
+                if strengths:
+                    for strength in strengths:
+                        st.markdown(f"- {strength}")
+                else:
+                    st.markdown("*No strengths identified*")
+            
+            with col2:
+                st.markdown("### Areas for Improvement")
+                improvements = result.get('Areas_for_Improvement', [])
+                if improvements:
+                    for improvement in improvements:
+                        st.markdown(f"- {improvement}")
+                else:
+                    st.markdown("*No specific improvement areas identified*")
+            
+            # Experience and Education
+            with st.expander("Experience & Education", expanded=False):
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    st.markdown("### Strengths")
-                    strengths = result.get('Strengths', [])
-                    if strengths:
-                        for strength in strengths:
-                            st.markdown(f"- {strength}")
+                    st.markdown("**Experience:**")
+                    experience = result.get('Experience', [])
+                    if experience:
+                        for exp in experience:
+                            st.markdown(f"- {exp}")
                     else:
-                        st.markdown("*No strengths identified*")
+                        st.markdown("*No experience details extracted*")
                 
                 with col2:
-                    st.markdown("### Areas for Improvement")
-                    improvements = result.get('Areas_for_Improvement', [])
-                    if improvements:
-                        for improvement in improvements:
-                            st.markdown(f"- {improvement}")
+                    st.markdown("**Education:**")
+                    education = result.get('Education', [])
+                    if education:
+                        for edu in education:
+                            st.markdown(f"- {edu}")
                     else:
-                        st.markdown("*No specific improvement areas identified*")
-                
-                # Experience and Education
-                with st.expander("Experience & Education", expanded=False):
-                    col1, col2 = st.columns(2)
+                        st.markdown("*No education details extracted*")
                     
-                    with col1:
-                        st.markdown("**Experience:**")
-                        experience = result.get('Experience', [])
-                        if experience:
-                            for exp in experience:
-                                st.markdown(f"- {exp}")
-                        else:
-                            st.markdown("*No experience details extracted*")
-                    
-                    with col2:
-                        st.markdown("**Education:**")
-                        education = result.get('Education', [])
-                        if education:
-                            for edu in education:
-                                st.markdown(f"- {edu}")
-                        else:
-                            st.markdown("*No education details extracted*")
-                        
-                        if 'Certifications' in result and result['Certifications']:
-                            st.markdown("**Certifications:**")
-                            for cert in result['Certifications']:
-                                st.markdown(f"- {cert}")
+                    if 'Certifications' in result and result['Certifications']:
+                        st.markdown("**Certifications:**")
+                        for cert in result['Certifications']:
+                            st.markdown(f"- {cert}")
+    
+        # Resume extraction timings from the last upload
+        extraction_stats = candidate_store.extraction_stats(st.session_state.run_id)
+        if extraction_stats:
+            with st.expander("Resume Extraction Details", expanded=False):
+                st.dataframe(pd.DataFrame(extraction_stats), use_container_width=True)
+        
+        # Results restored from the checkpoint or cache can predate a change in the model or prompt
+        if st.button("🔁 Re-run Analysis from Scratch", help="Discard saved and cached results and analyze every resume again"):
+            with st.spinner("Re-analyzing every resume..."):
+                rerun_analysis()
+            st.success("All resumes re-analyzed!")
         
         # Navigation buttons
         col1, col2, col3 = st.columns([1, 1, 5])
@@ -1704,7 +1653,21 @@ elif st.session_state.current_step == 3:
 elif st.session_state.current_step == 4:
     st.markdown("## Step 4: Shortlist Candidates")
     
-    if st.session_state.analysis_results:
+    if has_results():
+        render_job_selector()
+        
+        # Overview of every candidate against every job
+        if len(st.session_state.job_summaries) > 1:
+            with st.expander("Candidate × Job Match Matrix", expanded=False):
+                analysis_matrix = [
+                    [result for _, result in candidate_store.analyses(st.session_state.run_id, j)]
+                    for j in range(len(st.session_state.job_summaries))
+                ]
+                st.dataframe(
+                    build_match_matrix(analysis_matrix, st.session_state.job_summaries),
+                    use_container_width=True
+                )
+        
         st.markdown("### Candidate Assessment")
         
         # Threshold for shortlisting
@@ -1712,48 +1675,86 @@ elif st.session_state.current_step == 4:
         
         if st.button("Generate Shortlist"):
             with st.spinner("Generating shortlist..."):
-                # Generate shortlist based on threshold
-                st.session_state.shortlisted = shortlist_candidates(st.session_state.analysis_results, threshold)
-                st.success(f"Shortlist generated! {len(st.session_state.shortlisted)} candidates meet the {threshold}% threshold.")
+                # Generate shortlist for the selected job based on threshold
+                _, scored = candidate_store.candidate_page(
+                    st.session_state.run_id, st.session_state.active_job, min_match=threshold
+                )
+                job_shortlist = [
+                    (candidate_id, entry)
+                    for candidate_id, _, _, result in scored
+                    for entry in shortlist_candidates([result], threshold)
+                ]
+                candidate_store.replace_shortlist(st.session_state.run_id, st.session_state.active_job, job_shortlist)
+                st.success(f"Shortlist generated! {len(job_shortlist)} candidates meet the {threshold}% threshold.")
         
         # Display all candidates with filtering options
         st.markdown("### All Candidates")
         
-        # Sort options
-        sort_option = st.selectbox("Sort by", ["Match % (High to Low)", "Match % (Low to High)", "Name (A-Z)"])
+        # Filters and sorting run in the store; only the current page is rendered
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
+        
+        with filter_col1:
+            match_range = st.slider("Overall Match %", min_value=0, max_value=100, value=(0, 100), step=5)
+        
+        with filter_col2:
+            recommendation = st.selectbox(
+                "Recommendation", ["All", "shortlist", "further review", "reject"], format_func=str.capitalize
+            )
+        
+        with filter_col3:
+            missing_skill = st.selectbox(
+                "Missing Skill",
+                ["Any"] + candidate_store.missing_skills(st.session_state.run_id, st.session_state.active_job)
+            )
+        
+        sort_option = st.selectbox("Sort by", list(SORT_ORDERS))
+        
+        total, pages, page_rows = load_candidate_page(
+            SORT_ORDERS[sort_option],
+            min_match=match_range[0],
+            max_match=match_range[1],
+            recommendation=None if recommendation == "All" else recommendation,
+            missing_skill=None if missing_skill == "Any" else missing_skill
+        )
+        shortlisted_ids = candidate_store.shortlisted_ids(st.session_state.run_id, st.session_state.active_job)
+        
+        # Page navigation
+        first = st.session_state.candidate_page * CANDIDATES_PER_PAGE
+        nav_col1, nav_col2, nav_col3 = st.columns([1, 3, 1])
         
-        # Create a list of candidates with their analysis
+        with nav_col1:
+            st.button("⬅️ Previous Page", disabled=st.session_state.candidate_page == 0, on_click=turn_page, args=(-1,))
+        
+        with nav_col2:
+            if total:
+                st.caption(f"Showing {first + 1}-{first + len(page_rows)} of {total} candidates · page {st.session_state.candidate_page + 1} of {pages}")
+            else:
+                st.caption("No candidates match these filters.")
+        
+        with nav_col3:
+            st.button("Next Page ➡️", disabled=st.session_state.candidate_page >= pages - 1, on_click=turn_page, args=(1,))
+        
+        # Card data for this page
         candidates_list = []
-        for i, result in enumerate(st.session_state.analysis_results):
-            if "error" in result:
-                continue
-                
-            match_percentage = int(result.get("OverallMatch", "0%").strip("%"))
-            
+        for candidate_id, position, similarity, result in page_rows:
             candidates_list.append({
-                "index": i,
-                "name": result.get("CandidateName", f"Candidate {i+1}"),
-                "match_percentage": match_percentage,
+                "index": position,
+                "candidate_id": candidate_id,
+                "name": result.get("CandidateName", f"Candidate {position+1}"),
+                "match_percentage": int(result.get("OverallMatch", "0%").strip("%")),
                 "recommendation": result.get("Recommendation", "further review"),
                 "strengths": result.get("Strengths", []),
                 "missing_skills": result.get("MissingSkills", []),
-                "contact": result.get("ContactInfo", "Not available")
+                "contact": result.get("ContactInfo", "Not available"),
+                "similarity": round(similarity * 100) if similarity is not None else None
             })
         
-        # Sort based on selected option
-        if sort_option == "Match % (High to Low)":
-            candidates_list.sort(key=lambda x: x["match_percentage"], reverse=True)
-        elif sort_option == "Match % (Low to High)":
-            candidates_list.sort(key=lambda x: x["match_percentage"])
-        else:  # Name (A-Z)
-            candidates_list.sort(key=lambda x: x["name"])
-        
         # Display candidates
         for candidate in candidates_list:
             match_class = "match-high" if candidate["match_percentage"] >= 70 else ("match-medium" if candidate["match_percentage"] >= 50 else "match-low")
             
             # Check if candidate is in shortlist
-            shortlisted = any(s["name"] == candidate["name"] for s in st.session_state.shortlisted)
+            shortlisted = candidate["candidate_id"] in shortlisted_ids
             
             # Create candidate card with appropriate styling
             card_class = "candidate-card"
@@ -1771,6 +1772,7 @@ elif st.session_state.current_step == 4:
                 <div style="display: flex; gap: 1rem; flex-wrap: wrap; margin-bottom: 0.5rem;">
                     <div><strong>Contact:</strong> {candidate["contact"]}</div>
                     <div><strong>Recommendation:</strong> {candidate["recommendation"].capitalize()}</div>
+                    <div><strong>Similarity:</strong> {f'{candidate["similarity"]}%' if candidate["similarity"] is not None else 'n/a'}</div>
                 </div>
                 <div class="match-progress">
                     <div class="match-progress-bar {match_class}" style="width: {candidate["match_percentage"]}%"></div>
@@ -1788,12 +1790,14 @@ elif st.session_state.current_step == 4:
             col1, col2, col3 = st.columns([1, 1, 3])
             
             with col1:
-                if st.button(f"{'✓ Shortlisted' if shortlisted else 'Shortlist'}", key=f"shortlist_{candidate['index']}", 
+                if st.button(f"{'✓ Shortlisted' if shortlisted else 'Shortlist'}", key=f"shortlist_{candidate['candidate_id']}", 
                              type="primary" if not shortlisted else "secondary"):
                     # Toggle shortlisting
                     if shortlisted:
                         # Remove from shortlist
-                        st.session_state.shortlisted = [s for s in st.session_state.shortlisted if s["name"] != candidate["name"]]
+                        candidate_store.remove_from_shortlist(
+                            st.session_state.run_id, st.session_state.active_job, candidate["candidate_id"]
+                        )
                     else:
                         # Add to shortlist
                         new_shortlist = {
@@ -1804,29 +1808,33 @@ elif st.session_state.current_step == 4:
                             "missing_skills": candidate["missing_skills"],
                             "recommendation": candidate["recommendation"]
                         }
-                        st.session_state.shortlisted.append(new_shortlist)
+                        candidate_store.add_to_shortlist(
+                            st.session_state.run_id, st.session_state.active_job, candidate["candidate_id"], new_shortlist
+                        )
                     
                     st.experimental_rerun()
             
             with col2:
-                if st.button("View Details", key=f"view_{candidate['index']}"):
-                    # Set index for detailed view
-                    st.session_state.current_candidate_index = candidate["index"]
-                    st.session_state.show_candidate_details = True
+                if st.button("View Details", key=f"view_{candidate['candidate_id']}"):
+                    # Open the candidate's full analysis in Step 3
+                    st.session_state.review_candidate = candidate["candidate_id"]
+                    go_to_step(3)
+                    st.experimental_rerun()
             
             st.markdown("</div></div>", unsafe_allow_html=True)
         
         # Show shortlisted candidates
-        if st.session_state.shortlisted:
+        shortlisted = current_shortlist()
+        if shortlisted:
             st.markdown("### Shortlisted Candidates")
             
             shortlist_html = ""
-            for candidate in st.session_state.shortlisted:
+            for candidate in shortlisted:
                 shortlist_html += f"""
                 <div style="background-color: rgba(99, 212, 113, 0.1); border-left: 4px solid var(--success-color); 
                             padding: 0.75rem; margin-bottom: 0.5rem; border-radius: var(--border-radius);">
                     <div style="display: flex; justify-content: space-between;">
-                        <strong>{candidate["name"]}</strong>
+                        <strong>{shortlist_label(candidate)}</strong>
                         <span>{candidate["match_percentage"]}% Match</span>
                     </div>
                 </div>
@@ -1855,8 +1863,9 @@ elif st.session_state.current_step == 4:
 # Step 5: Schedule Interviews
 elif st.session_state.current_step == 5:
     st.markdown("## Step 5: Schedule Interviews")
+    shortlisted = current_shortlist()
     
-    if not st.session_state.shortlisted:
+    if not shortlisted:
         st.warning("No candidates have been shortlisted. Please go back and shortlist candidates first.")
         
         if st.button("⬅️ Back to Shortlisting"):
@@ -1865,15 +1874,84 @@ elif st.session_state.current_step == 5:
     else:
         st.markdown("### Schedule Interview Invitations")
         
+        # Draft every shortlisted candidate's invitation at once; each draft is saved as it lands
+        interviews = candidate_store.interviews(st.session_state.run_id)
+        regenerate = st.checkbox("Regenerate existing drafts", value=False)
+        # Candidates already invited are left out of bulk regeneration and sending unless asked for
+        resend = st.checkbox("Include candidates already invited", value=False)
+        drafts = {key: interview["email"] for key, interview in interviews.items() if interview["email"]}
+        invited = {key for key, interview in interviews.items() if interview["status"] == SENT}
+        to_generate = [
+            candidate for candidate in shortlisted
+            if (resend or (candidate["job_index"], candidate["candidate_id"]) not in invited)
+            and (regenerate or (candidate["job_index"], candidate["candidate_id"]) not in drafts)
+        ]
+        
+        if st.button(
+            f"Generate All Invitations ({len(to_generate)})", key="generate_all_invitations", disabled=not to_generate
+        ):
+            with st.spinner(f"Generating {len(to_generate)} interview invitations..."):
+                on_event = progress_renderer(ProgressTracker({"email": len(to_generate)}))
+                
+                # A failed regeneration keeps the candidate's previous draft
+                def save_invitation(index, email_data):
+                    key = (to_generate[index]["job_index"], to_generate[index]["candidate_id"])
+                    if "error" in email_data:
+                        status = draft_status(interviews.get(key), "Generation Failed")
+                        candidate_store.save_interview(st.session_state.run_id, *key, status, drafts.get(key))
+                    else:
+                        status = draft_status(interviews.get(key), "Email Generated")
+                        candidate_store.save_interview(st.session_state.run_id, *key, status, email_data)
+                
+                emails = generate_interview_emails_concurrently(
+                    [(candidate, job_summary_for(candidate)) for candidate in to_generate],
+                    MAX_CONCURRENT_ANALYSES, on_event, save_invitation
+                )
+                
+                failed = sum(1 for email_data in emails if "error" in email_data)
+                if failed:
+                    st.warning(f"Generated {len(emails) - failed} invitations; {failed} failed and can be retried.")
+                else:
+                    st.success(f"Generated {len(emails)} interview invitations!")
+        
+        # Send every draft that has not gone out yet (and, when asked, resend sent ones)
+        interviews = candidate_store.interviews(st.session_state.run_id)
+        skipped = (QUEUED, UNDELIVERABLE) if resend else (QUEUED, SENT, UNDELIVERABLE)
+        unsent = []
+        for candidate in shortlisted:
+            interview = interviews.get((candidate["job_index"], candidate["candidate_id"]))
+            if interview and interview["email"] and interview_status(candidate, interview) not in skipped:
+                unsent.append((candidate, interview["email"]))
+        
+        if not EMAIL_ADDRESS:
+            st.caption("Set EMAIL_ADDRESS and EMAIL_PASSWORD to send invitations directly over SMTP.")
+        elif st.button(f"Send All Invitations ({len(unsent)})", key="send_all_invitations", disabled=not unsent):
+            queued = sum(send_invitation(candidate, email_data) for candidate, email_data in unsent)
+            st.success(f"Queued {queued} invitations for delivery. Statuses update as they are sent.")
+            undeliverable = sum(1 for _, email_data in unsent if not recipient_address(email_data))
+            if undeliverable:
+                st.warning(f"{undeliverable} candidates have no email address and were marked {UNDELIVERABLE}.")
+        
+        delivery_stats = delivery_queue.stats()
+        if delivery_stats["pending"] or delivery_stats["sent"] or delivery_stats["failed"]:
+            st.caption(
+                f"Delivery: {delivery_stats['pending']} queued · {delivery_stats['sent']} sent · "
+                f"{delivery_stats['failed']} failed · {delivery_stats['retries']} retries"
+            )
+        
         # Select candidate to schedule
-        candidate_names = [candidate["name"] for candidate in st.session_state.shortlisted]
-        selected_candidate_name = st.selectbox("Select Candidate", candidate_names)
+        selected_index = st.selectbox(
+            "Select Candidate",
+            range(len(shortlisted)),
+            format_func=lambda i: shortlist_label(shortlisted[i])
+        )
         
         # Find the selected candidate
-        selected_candidate = next((c for c in st.session_state.shortlisted if c["name"] == selected_candidate_name), None)
+        selected_candidate = shortlisted[selected_index] if selected_index is not None else None
         
         if selected_candidate:
-            st.session_state.selected_candidate = selected_candidate
+            selected_key = (selected_candidate["job_index"], selected_candidate["candidate_id"])
+            st.session_state.selected_candidate = selected_key
             
             col1, col2 = st.columns([2, 1])
             
@@ -1889,36 +1967,46 @@ elif st.session_state.current_step == 5:
             with col2:
                 if st.button("Generate Interview Invitation", type="primary"):
                     with st.spinner("Generating interview invitation..."):
+                        on_event = progress_renderer(ProgressTracker({"email": 1}))
+                        
                         # Generate email for candidate
-                        email_data = generate_interview_email(selected_candidate, st.session_state.jd_summary)
+                        email_data = run_with_events(
+                            "email", selected_candidate["name"], on_event,
+                            generate_interview_email, selected_candidate, job_summary_for(selected_candidate)
+                        )
                         
                         if "error" not in email_data:
-                            st.session_state.interview_email = email_data
+                            previous = candidate_store.interviews(st.session_state.run_id).get(selected_key)
+                            candidate_store.save_interview(
+                                st.session_state.run_id, *selected_key, draft_status(previous, "Email Generated"), email_data
+                            )
                             st.success("Interview invitation generated!")
                         else:
                             st.error(f"Error generating invitation: {email_data['error']}")
             
-            # Display generated email
-            if st.session_state.interview_email:
+            # Display the candidate's latest generated email
+            interview = candidate_store.interviews(st.session_state.run_id).get(selected_key)
+            interview_email = interview["email"] if interview else None
+            if interview_email:
                 st.markdown("### Interview Invitation Preview")
                 
                 st.markdown('<div class="email-preview">', unsafe_allow_html=True)
-                st.markdown(f"**To:** {st.session_state.interview_email['candidate_email']}")
-                st.markdown(f"**Subject:** {st.session_state.interview_email['email_subject']}")
+                st.markdown(f"**To:** {interview_email['candidate_email']}")
+                st.markdown(f"**Subject:** {interview_email['email_subject']}")
                 st.markdown("**Body:**")
-                st.markdown(st.session_state.interview_email['email_body'])
+                st.markdown(interview_email['email_body'])
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # Email sending options
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 
                 with col1:
                     if st.button("Copy to Clipboard"):
                         # Generate text for clipboard
-                        email_text = f"""To: {st.session_state.interview_email['candidate_email']}
-Subject: {st.session_state.interview_email['email_subject']}
+                        email_text = f"""To: {interview_email['candidate_email']}
+Subject: {interview_email['email_subject']}
 
-{st.session_state.interview_email['email_body']}"""
+{interview_email['email_body']}"""
                         
                         # Use streamlit to copy to clipboard (this is a placeholder - actual clipboard functionality requires JavaScript)
                         st.code(email_text)
@@ -1926,13 +2014,25 @@ Subject: {st.session_state.interview_email['email_subject']}
                 
                 with col2:
                     # Generate mailto link
-                    mailto_data = generate_mailto_link(st.session_state.interview_email)
+                    mailto_data = generate_mailto_link(interview_email)
                     
                     if mailto_data["status"] == "success":
                         mailto_link = mailto_data["mailto_link"]
                         st.markdown(f'<a href="{mailto_link}" target="_blank"><button style="background-color: var(--success-color); color: white; padding: 0.5rem 1rem; border: none; border-radius: 4px; cursor: pointer; width: 100%;">Open in Email Client</button></a>', unsafe_allow_html=True)
                     else:
                         st.error(mailto_data["message"])
+                
+                with col3:
+                    # A candidate who was already invited is only emailed again on an explicit resend
+                    status = interview_status(selected_candidate, interview)
+                    if st.button(
+                        "Resend Email" if status == SENT else "Send Email",
+                        disabled=not EMAIL_ADDRESS or status in (QUEUED, UNDELIVERABLE)
+                    ):
+                        if send_invitation(selected_candidate, interview_email):
+                            st.success("Invitation queued for delivery.")
+                        else:
+                            st.error("No email address found in the candidate's contact details.")
         
         # Navigation
         if st.button("⬅️ Back to Shortlisting"):
@@ -1943,20 +2043,25 @@ Subject: {st.session_state.interview_email['email_subject']}
         st.markdown("### Interview Scheduling Progress")
         
         # Create a progress table
+        interviews = candidate_store.interviews(st.session_state.run_id)
         progress_data = []
-        for candidate in st.session_state.shortlisted:
-            # Check if an email has been generated for this candidate
-            email_sent = (st.session_state.selected_candidate and 
-                         st.session_state.selected_candidate["name"] == candidate["name"] and 
-                         st.session_state.interview_email is not None)
+        for candidate in shortlisted:
+            interview = interviews.get((candidate["job_index"], candidate["candidate_id"]))
+            
+            status = interview_status(candidate, interview) if interview else "Pending"
+            if status in (DELIVERY_FAILED, UNDELIVERABLE) and interview["error"]:
+                status = f"{status}: {interview['error']}"
             
             progress_data.append({
-                "name": candidate["name"],
+                "name": shortlist_label(candidate),
                 "email": candidate["contact"],
                 "match": f"{candidate['match_percentage']}%",
-                "status": "Email Generated" if email_sent else "Pending"
+                "status": status
             })
         
+        # Deliveries finish in the background; clicking reruns the page with the latest statuses
+        st.button("🔄 Refresh Status")
+        
         # Convert to DataFrame for display
         if progress_data:
             import pandas as pd
@@ -1968,4 +2073,8 @@ st.markdown("""
 <div style="text-align: center; margin-top: 3rem; padding-top: 1rem; border-top: 1px solid #eee; color: #777;">
     EzHunt AI Recruitment Assistant | Powered by Generative AI | © 2025
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+metrics.observe("step_render_seconds", time.perf_counter() - render_start, step=str(render_step))
+if METRICS_FILE:
+    metrics.write_file(METRICS_FILE)
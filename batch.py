@@ -0,0 +1,225 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from agents import (
+    analyze_cv_matrix, job_text, read_jobs_from_csv, shortlist_candidates,
+    summarize_job_description, summarize_jobs_concurrently
+)
+from cache import make_cache_key
+from checkpoint import RunCheckpoint, analysis_settings
+from config import (
+    CACHE_DB_PATH, DUPLICATE_SIMILARITY, MAX_CONCURRENT_ANALYSES, MAX_PDF_CHARS, MAX_PDF_PAGES, METRICS_FILE,
+    PDF_EXTRACTION_WORKERS
+)
+from duplicates import group_duplicates
+from extraction import extract_pdf_text, extract_pdf_texts, has_resume_text
+from metrics import metrics
+from screening import compute_similarity_matrix
+
+# Headless screening run: scores a folder of resumes against one or more jobs and streams
+# one JSON line per candidate as soon as all of its jobs are scored. Every result is also
+# checkpointed under a run ID, so rerunning an interrupted command only analyzes what is left.
+#
+#   python batch.py --jd job.txt --resumes resumes/ --output results.jsonl
+
+# Load the job descriptions to screen against: a CSV (one job per row), a PDF or plain text
+def load_job_texts(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        parsed = read_jobs_from_csv(path)
+        if "error" in parsed:
+            raise ValueError(parsed["error"])
+        return [job_text(job) for job in parsed["jobs"]]
+
+    if extension == ".pdf":
+        with open(path, "rb") as f:
+            return [extract_pdf_text(f.read(), MAX_PDF_PAGES, MAX_PDF_CHARS)["text"]]
+
+    with open(path, encoding="utf-8") as f:
+        return [f.read()]
+
+# Resume PDFs from a directory or glob pattern, in a stable order
+def find_resumes(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.pdf")
+    return sorted(path for path in glob.glob(pattern) if path.lower().endswith(".pdf"))
+
+# Default run ID: the same jobs against the same files (path, size, modification time)
+# under the same analysis settings
+def default_run_id(job_summaries, paths):
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append([os.path.abspath(path), stat.st_size, int(stat.st_mtime)])
+    return make_cache_key(job_summaries, files, analysis_settings())[:16]
+
+# Summarize every job; one job is summarized inline, several concurrently
+def summarize_jobs(job_texts, max_workers):
+    if len(job_texts) == 1:
+        return [summarize_job_description(job_texts[0])]
+    jobs = [{"title": "", "description": text} for text in job_texts]
+    return summarize_jobs_concurrently(jobs, max_workers)
+
+# One output line for a candidate once every job has a result
+def candidate_record(path, extraction, job_summaries, results, threshold):
+    jobs = []
+    best_job, best_match = None, -1
+    for j, result in enumerate(results):
+        title = job_summaries[j].get("JobTitle", f"Job {j+1}")
+        shortlisted = bool(shortlist_candidates([result], threshold))
+        jobs.append({"job_index": j, "job_title": title, "shortlisted": shortlisted, "analysis": result})
+
+        if "error" not in result:
+            match = int(result.get("OverallMatch", "0%").strip("%"))
+            if match > best_match:
+                best_job, best_match = j, match
+
+    return {
+        "file": path,
+        "pages": extraction["pages"],
+        "extraction_error": extraction["error"],
+        "duplicate_of": extraction.get("duplicate_of"),
+        "best_job_index": best_job,
+        "best_match": best_match if best_job is not None else None,
+        "shortlisted": any(job["shortlisted"] for job in jobs),
+        "jobs": jobs
+    }
+
+# Screen resumes chunk by chunk so memory stays bounded by the chunk size, not the folder size.
+# Candidates fully finished by an earlier attempt of the run are written from the checkpoint
+# without reading their files again. Duplicate resumes within a chunk are analyzed once and
+# written for every file; exact copies in different chunks are served by the analysis cache.
+def run_batch(job_summaries, paths, output, max_workers, threshold, chunk_size, checkpoint):
+    totals = {"candidates": 0, "shortlisted": 0, "errors": 0, "resumed": 0, "duplicates": 0}
+    saved_candidates = checkpoint.candidates()
+    saved_results = checkpoint.results()
+
+    def write(path, extraction, results):
+        record = candidate_record(path, extraction, job_summaries, results, threshold)
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+        totals["candidates"] += 1
+        totals["shortlisted"] += record["shortlisted"]
+        totals["errors"] += any("error" in job["analysis"] for job in record["jobs"])
+        totals["duplicates"] += record["duplicate_of"] is not None
+
+    remaining = []
+    for path in paths:
+        results = [saved_results.get((path, j)) for j in range(len(job_summaries))]
+        if path in saved_candidates and all(result is not None for result in results):
+            write(path, saved_candidates[path], results)
+            totals["resumed"] += 1
+        else:
+            remaining.append(path)
+    del saved_results
+
+    for start in range(0, len(remaining), chunk_size):
+        chunk = remaining[start:start + chunk_size]
+        files = []
+        for path in chunk:
+            with open(path, "rb") as f:
+                files.append((path, f.read()))
+
+        extractions = extract_pdf_texts(files, PDF_EXTRACTION_WORKERS, MAX_PDF_PAGES, MAX_PDF_CHARS)
+        del files
+
+        groups = group_duplicates(
+            [extraction["text"] for extraction in extractions], DUPLICATE_SIMILARITY,
+            separate=[k for k, extraction in enumerate(extractions) if not has_resume_text(extraction)]
+        )
+        infos = [None] * len(chunk)
+        for group in groups:
+            for k in group:
+                infos[k] = {
+                    "pages": extractions[k]["pages"],
+                    "error": extractions[k]["error"],
+                    "duplicate_of": chunk[group[0]] if k != group[0] else None
+                }
+                checkpoint.save_candidate(chunk[k], infos[k])
+
+        cv_texts = [extractions[group[0]]["text"] for group in groups]
+        similarity = compute_similarity_matrix(cv_texts, job_summaries)
+
+        pending = {i: [None] * len(job_summaries) for i in range(len(groups))}
+
+        def emit(job_index, group_index, result):
+            results = pending[group_index]
+            results[job_index] = result
+            if all(r is not None for r in results):
+                for k in groups[group_index]:
+                    # Copies share the representative's results, checkpointed under their own path
+                    if k != groups[group_index][0]:
+                        for j, job_result in enumerate(results):
+                            if "error" not in job_result:
+                                checkpoint.save_result(chunk[k], j, job_result)
+                    write(chunk[k], infos[k], results)
+                del pending[group_index]
+
+        analyze_cv_matrix(
+            cv_texts, job_summaries, max_workers, similarity=similarity, on_result=emit,
+            checkpoint=checkpoint, candidate_ids=[chunk[group[0]] for group in groups]
+        )
+
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a folder of resumes against job descriptions without the UI.")
+    parser.add_argument("--jd", required=True, help="Job description file (.txt, .pdf, or .csv with one job per row)")
+    parser.add_argument("--resumes", required=True, help="Directory of resume PDFs or a glob pattern")
+    parser.add_argument("--output", default="-", help="JSONL output path ('-' for stdout)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_ANALYSES, help="Parallel model requests")
+    parser.add_argument("--threshold", type=int, default=70, help="Minimum match percentage to shortlist")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Resumes held in memory at once")
+    parser.add_argument("--run-id", help="Checkpoint run ID to resume (defaults to one derived from the inputs)")
+    parser.add_argument("--restart", action="store_true", help="Discard the run's checkpoint and start over")
+    parser.add_argument("--metrics-file", default=METRICS_FILE, help="Write Prometheus-format metrics here when done")
+    args = parser.parse_args(argv)
+
+    paths = find_resumes(args.resumes)
+    if not paths:
+        parser.error(f"No resume PDFs found at {args.resumes}")
+
+    try:
+        job_texts = load_job_texts(args.jd)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    job_summaries = summarize_jobs(job_texts, args.concurrency)
+    failed = [summary["error"] for summary in job_summaries if "error" in summary]
+    if failed:
+        print(f"Job description summarization failed: {failed[0]}", file=sys.stderr)
+        return 1
+
+    checkpoint = RunCheckpoint(CACHE_DB_PATH, args.run_id or default_run_id(job_summaries, paths))
+    if args.restart:
+        checkpoint.clear()
+    print(f"Run ID: {checkpoint.run_id}", file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        totals = run_batch(
+            job_summaries, paths, output, args.concurrency, args.threshold, max(1, args.chunk_size), checkpoint
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.metrics_file:
+            metrics.write_file(args.metrics_file)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Screened {totals['candidates']} resumes against {len(job_summaries)} job(s) in {elapsed:.1f}s: "
+        f"{totals['shortlisted']} shortlisted, {totals['errors']} with errors, "
+        f"{totals['duplicates']} duplicates, {totals['resumed']} restored from the checkpoint",
+        file=sys.stderr
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+import google.generativeai as genai
+from google.api_core import exceptions
+
+# Deterministic stand-in for genai.GenerativeModel. Every response (latency, failure, scores)
+# is derived from the seed and the prompt, so two runs with the same settings see the same
+# backend. Recognizes the app's summarizer, analysis (single and batched), fit paragraph and
+# email prompts.
+class FakeBackend:
+    def __init__(self, latency=0.05, jitter=0.2, error_rate=0.0, response_chars=1500, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self.seed = seed
+        self.calls = 0
+        self.errors = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.calls += 1
+            # Repeated prompts (retries) draw a new outcome
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def respond(self, prompt):
+        rng = self._rng(prompt)
+        time.sleep(max(0.0, self.latency * (1 + rng.uniform(-self.jitter, self.jitter))))
+
+        if rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise exceptions.ServiceUnavailable("The model is overloaded (fake backend)")
+
+        if "job description analyzer" in prompt:
+            return self._summary(prompt)
+        if "=== Candidate" in prompt:
+            ids = [int(i) for i in re.findall(r"=== Candidate (\d+) ===", prompt)]
+            items = [dict(self._analysis(rng), CandidateId=i) for i in ids]
+            return json.dumps(items)
+        if "--- Invitee" in prompt:
+            ids = [int(i) for i in re.findall(r"--- Invitee (\d+) ---", prompt)]
+            return json.dumps([{"CandidateId": i, "Paragraph": self._padding(200)} for i in ids])
+        if "Candidate Resume:" in prompt:
+            return json.dumps(self._analysis(rng))
+        return self._email(prompt)
+
+    def _padding(self, size):
+        words = ["stakeholder", "reporting", "pipeline", "dashboard", "analysis", "delivery"]
+        return " ".join(words[i % len(words)] for i in range(max(0, size) // 10))
+
+    def _summary(self, prompt):
+        title = re.search(r"Job Title: ([^\n]+)", prompt)
+        return json.dumps({
+            "JobTitle": title.group(1).strip() if title else "Data Analyst",
+            "Department": "Analytics",
+            "Location": "Remote",
+            "EmploymentType": "Full-time",
+            "RequiredSkills": ["SQL", "Python", "Excel", "Tableau"],
+            "RequiredExperience": "2+ years",
+            "RequiredQualifications": ["Bachelor's degree"],
+            "Responsibilities": ["Analyze data", self._padding(self.response_chars // 4)],
+            "SalaryRange": "Not specified",
+            "PreferredSkills": ["AWS"]
+        })
+
+    def _analysis(self, rng):
+        match = rng.randint(40, 95)
+        return {
+            "CandidateName": f"Candidate {rng.randint(1000, 9999)}",
+            "ContactInfo": "candidate@example.com",
+            "Skills": ["SQL", "Python", "Excel"],
+            "Experience": [self._padding(self.response_chars)],
+            "Education": ["BSc Statistics"],
+            "Certifications": [],
+            "SkillMatch": f"{min(100, match + 5)}%",
+            "ExperienceMatch": f"{match}%",
+            "QualificationMatch": f"{max(0, match - 5)}%",
+            "OverallMatch": f"{match}%",
+            "MatchedSkills": ["SQL", "Python"],
+            "MissingSkills": ["Tableau"],
+            "Strengths": ["SQL", "Reporting"],
+            "Areas_for_Improvement": ["Cloud tooling"],
+            "Recommendation": "shortlist" if match >= 70 else "further review"
+        }
+
+    def _email(self, prompt):
+        return "Dear candidate,\n\nWe would like to invite you to interview.\n\n" + self._padding(self.response_chars)
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+# Replace the SDK's model class with one backed by the fake. Call before importing agents.
+def install(backend):
+    class FakeGenerativeModel:
+        def __init__(self, model_name=None, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, contents, **kwargs):
+            prompt = contents if isinstance(contents, str) else "\n".join(str(part) for part in contents)
+            return FakeResponse(backend.respond(prompt))
+
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    return backend
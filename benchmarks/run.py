@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Benchmarks the whole pipeline against a fake Gemini backend, so no quota is spent:
+#
+#   python benchmarks/run.py                                  # 10, 100 and 1000 candidates
+#   python benchmarks/run.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/run.py --compare benchmarks/baseline.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_gemini import FakeBackend, install
+
+STAGES = ["extraction", "summarization", "analysis", "shortlisting", "email"]
+
+SKILL_POOL = ["SQL", "Python", "Excel", "Tableau", "Power BI", "R", "AWS", "Statistics", "ETL", "Spark"]
+
+# Minimal single-font PDF with one text line per resume line
+def make_pdf(text):
+    lines = [line.replace("\\", "").replace("(", "").replace(")", "") for line in text.split("\n")]
+    stream = "BT /F1 11 Tf 50 760 Td 14 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+# Synthetic resume; the tag keeps scenarios of different sizes from sharing cached results
+def make_resume(tag, index):
+    skills = [SKILL_POOL[(index * 3 + k) % len(SKILL_POOL)] for k in range(4)]
+    return "\n".join([
+        f"Candidate Number{index}",
+        f"Email: candidate{index}@example.com",
+        f"Summary: Data analyst with {index % 9 + 1} years of experience ({tag})",
+        "Skills: " + ", ".join(skills),
+        "Experience: Built dashboards and automated reporting for business teams",
+        "Education: Bachelor of Science in Statistics"
+    ])
+
+def make_job(tag, index):
+    return {
+        "title": f"Data Analyst {index + 1}",
+        "description": f"We need SQL, Python and Excel skills, Tableau is a plus. Posting {tag}-{index}."
+    }
+
+# Collects per-item latencies, wall time and peak traced memory for one stage. Memory is the
+# peak Python allocation above what was already allocated when the stage started.
+class StageMeter:
+    def __init__(self, stage, items):
+        self.stage = stage
+        self.items = items
+        self.latencies = []
+        self.failed = 0
+
+    def on_event(self, event):
+        if event["stage"] == self.stage and event["status"] != "started":
+            self.latencies.append(event["latency"] or 0.0)
+            self.failed += event["status"] == "failed"
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        self.peak_mb = (tracemalloc.get_traced_memory()[1] - self.start_memory) / (1024 * 1024)
+
+    def summary(self):
+        latencies = sorted(self.latencies) or [self.seconds]
+        return {
+            "items": self.items,
+            "failed": self.failed,
+            "seconds": round(self.seconds, 4),
+            "items_per_sec": round(self.items / self.seconds, 2) if self.seconds else None,
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 2),
+            "peak_mb": round(self.peak_mb, 2)
+        }
+
+def run_scenario(size, args):
+    from agents import (
+        analyze_cv_matrix, generate_interview_emails_concurrently, shortlist_candidates, summarize_jobs_concurrently
+    )
+    from extraction import extract_pdf_texts
+    from screening import compute_similarity_matrix
+
+    tag = f"{args.seed}-{size}"
+    files = [(f"resume_{i}.pdf", make_pdf(make_resume(tag, i))) for i in range(size)]
+    jobs = [make_job(tag, j) for j in range(args.jobs)]
+    results = {}
+
+    with StageMeter("extraction", size) as meter:
+        extractions = extract_pdf_texts(files, args.extraction_workers, on_event=meter.on_event)
+    results["extraction"] = meter.summary()
+    cv_texts = [extraction["text"] for extraction in extractions]
+
+    with StageMeter("summarization", len(jobs)) as meter:
+        job_summaries = summarize_jobs_concurrently(jobs, args.concurrency, on_event=meter.on_event)
+    results["summarization"] = meter.summary()
+
+    with StageMeter("analysis", size * len(jobs)) as meter:
+        matrix = analyze_cv_matrix(
+            cv_texts, job_summaries, args.concurrency, on_event=meter.on_event,
+            similarity=compute_similarity_matrix(cv_texts, job_summaries)
+        )
+    results["analysis"] = meter.summary()
+
+    shortlist = []
+    with StageMeter("shortlisting", len(jobs)) as meter:
+        for j, row in enumerate(matrix):
+            start = time.perf_counter()
+            shortlist.extend((candidate, job_summaries[j]) for candidate in shortlist_candidates(row, args.threshold))
+            meter.latencies.append(time.perf_counter() - start)
+    results["shortlisting"] = meter.summary()
+
+    with StageMeter("email", len(shortlist)) as meter:
+        generate_interview_emails_concurrently(shortlist, args.concurrency, meter.on_event)
+    results["email"] = meter.summary()
+
+    return results
+
+def print_report(report):
+    print(f"{'size':>6} {'stage':<14} {'items':>6} {'failed':>6} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>8}")
+    for size, stages in report["scenarios"].items():
+        for stage in STAGES:
+            row = stages[stage]
+            print(
+                f"{size:>6} {stage:<14} {row['items']:>6} {row['failed']:>6} {row['items_per_sec'] or 0:>10.1f} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['peak_mb']:>8.2f}"
+            )
+    if report["max_rss_mb"] is not None:
+        print(f"Process peak RSS: {report['max_rss_mb']:.1f} MB")
+    print(
+        f"Model calls: {report['model_calls']} ({report['model_errors']} failed, "
+        f"{report['rate_limiter']['retries']} retried, {report['rate_limiter']['throttled_seconds']}s throttled)"
+    )
+    print(
+        f"Prompt tokens (est.): {report['rate_limiter']['input_tokens']} in, "
+        f"{report['rate_limiter']['output_tokens']} out, {report['rate_limiter']['tokens_per_call']} per call; "
+        f"resume compaction saved {report['compaction']['tokens_saved']} ({report['compaction']['saved_percent']}%)"
+    )
+
+# Regressions against a saved baseline: throughput dropping or p95 latency rising past the
+# tolerance. Changes smaller than min_delta_ms in absolute terms (stage time for throughput)
+# are timer noise on sub-millisecond stages and are not flagged.
+def compare_to_baseline(report, baseline, tolerance, min_delta_ms=0.0):
+    regressions = []
+    for size, stages in report["scenarios"].items():
+        for stage, row in stages.items():
+            base = baseline["scenarios"].get(size, {}).get(stage)
+            if not base:
+                continue
+            slower_ms = (row["seconds"] - base["seconds"]) * 1000
+            if (
+                base["items_per_sec"] and row["items_per_sec"] < base["items_per_sec"] * (1 - tolerance)
+                and slower_ms >= min_delta_ms
+            ):
+                regressions.append(f"{size} {stage}: {row['items_per_sec']} items/s vs baseline {base['items_per_sec']}")
+            if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance) + min_delta_ms:
+                regressions.append(f"{size} {stage}: p95 {row['p95_ms']} ms vs baseline {base['p95_ms']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the screening pipeline against a fake Gemini backend.")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated candidate counts")
+    parser.add_argument("--jobs", type=int, default=2, help="Job descriptions screened per scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction of --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake model calls that fail")
+    parser.add_argument("--response-chars", type=int, default=1500, help="Approximate fake response size")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel model requests")
+    parser.add_argument("--rpm", type=int, default=0, help="Rate limit in requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Rate limit in tokens per minute (0 = unlimited)")
+    parser.add_argument("--retry-base", type=float, default=0.05, help="Base retry backoff in seconds")
+    parser.add_argument("--extraction-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threshold", type=int, default=70, help="Shortlist cutoff")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before flagging")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Absolute change in ms always allowed")
+    args = parser.parse_args(argv)
+
+    # Keep benchmark results out of the real cache and off the network
+    cache_dir = tempfile.mkdtemp(prefix="ezhunt-bench-")
+    os.environ["EZHUNT_CACHE_DB"] = os.path.join(cache_dir, "cache.db")
+    os.environ["USE_CONTEXT_CACHE"] = "false"
+    os.environ["GEMINI_RPM"] = str(args.rpm)
+    os.environ["GEMINI_TPM"] = str(args.tpm)
+    os.environ["GEMINI_RETRY_BASE_SECONDS"] = str(args.retry_base)
+    backend = install(FakeBackend(args.latency, args.jitter, args.error_rate, args.response_chars, args.seed))
+
+    tracemalloc.start()
+    report = {
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "save_baseline", "compare")},
+        "python": platform.python_version(),
+        "scenarios": {}
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        report["scenarios"][str(size)] = run_scenario(size, args)
+    tracemalloc.stop()
+
+    report["model_calls"] = backend.calls
+    report["model_errors"] = backend.errors
+    from agents import rate_limiter
+    report["rate_limiter"] = rate_limiter.stats()
+    from agents import compaction_stats
+    report["compaction"] = compaction_stats.stats()
+    # ru_maxrss is in KB on Linux; there is no resource module on Windows
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
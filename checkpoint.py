@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import threading
+import time
+
+from cache import make_cache_key, normalize_text
+from config import (
+    CACHE_MAX_AGE_DAYS, CV_ANALYSIS_PROMPT_VERSION, GEMINI_MODEL, PRESCREEN_CUTOFF, PRESCREEN_MODE, PRESCREEN_VERSION
+)
+
+# Durable per-run progress: every finished (candidate, job) analysis is written as soon as it
+# lands, so an interrupted run can be restarted and only the missing pairs are sent again.
+# Candidates are keyed by a caller-chosen ID (content hash or file path), not by position.
+class RunCheckpoint:
+    def __init__(self, db_path, run_id, max_age_days=CACHE_MAX_AGE_DAYS):
+        self.run_id = run_id
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_results ("
+                "run_id TEXT NOT NULL, candidate_id TEXT NOT NULL, job_index INTEGER NOT NULL, "
+                "value TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, candidate_id, job_index))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_candidates ("
+                "run_id TEXT NOT NULL, candidate_id TEXT NOT NULL, "
+                "value TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, candidate_id))"
+            )
+            # Abandoned runs are not kept forever
+            cutoff = time.time() - self.max_age_seconds
+            self._conn.execute("DELETE FROM run_results WHERE updated_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM run_candidates WHERE updated_at < ?", (cutoff,))
+
+    # Finished analyses of this run as {(candidate_id, job_index): result}
+    def results(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT candidate_id, job_index, value FROM run_results WHERE run_id = ?", (self.run_id,)
+            ).fetchall()
+        return {(candidate_id, job_index): json.loads(value) for candidate_id, job_index, value in rows}
+
+    def save_result(self, candidate_id, job_index, result):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_results (run_id, candidate_id, job_index, value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, candidate_id, job_index, json.dumps(result), time.time())
+            )
+
+    # Per-candidate details recorded outside the analysis (e.g. extraction info)
+    def candidates(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT candidate_id, value FROM run_candidates WHERE run_id = ?", (self.run_id,)
+            ).fetchall()
+        return {candidate_id: json.loads(value) for candidate_id, value in rows}
+
+    def save_candidate(self, candidate_id, info):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_candidates (run_id, candidate_id, value, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.run_id, candidate_id, json.dumps(info), time.time())
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM run_results WHERE run_id = ?", (self.run_id,))
+            self._conn.execute("DELETE FROM run_candidates WHERE run_id = ?", (self.run_id,))
+
+# Stable candidate ID for resume text, so re-uploads in any order map to the same checkpoint rows
+def candidate_id_for(cv_text):
+    return make_cache_key(normalize_text(cv_text))[:16]
+
+# Candidate IDs for a list of resumes. Repeated texts that were kept apart (e.g. several
+# image-only PDFs with the same placeholder) get a numbered suffix so every ID stays unique.
+def candidate_ids_for(cv_texts):
+    candidate_ids = []
+    seen = {}
+    for cv_text in cv_texts:
+        candidate_id = candidate_id_for(cv_text)
+        seen[candidate_id] = seen.get(candidate_id, 0) + 1
+        candidate_ids.append(candidate_id if seen[candidate_id] == 1 else f"{candidate_id}-{seen[candidate_id]}")
+    return candidate_ids
+
+# Settings that decide a run's results. They are part of every run ID, so after a model,
+# prompt or pre-screen change the same inputs start a new run instead of restoring old results.
+def analysis_settings():
+    return [GEMINI_MODEL, CV_ANALYSIS_PROMPT_VERSION, PRESCREEN_CUTOFF, PRESCREEN_MODE, PRESCREEN_VERSION]
+
+# A run is identified by what it screens: the same jobs against the same candidates
+def make_run_id(job_summaries, candidate_ids):
+    return make_cache_key(job_summaries, sorted(candidate_ids), analysis_settings())[:16]
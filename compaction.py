@@ -0,0 +1,168 @@
+import re
+import threading
+
+# Rough token estimate (about 4 characters per token), shared by batch packing, rate
+# limiting and the resume budget below
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+# Characters PDF extraction commonly leaves behind
+_LIGATURES = str.maketrans({"\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl"})
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f\u200b\ufeff]")
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200a\u3000]+")
+
+# Page numbers ("3", "Page 2 of 4", "- 2 -", "2/4") and lines that carry no words
+_PAGE_NUMBER = re.compile(r"(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?|-\s*\d{1,3}\s*-", re.IGNORECASE)
+_NO_WORDS = re.compile(r"[\W_]*")
+
+# Boilerplate lines that tell the model nothing about the candidate
+_BOILERPLATE = re.compile(
+    r"(curriculum vitae|r[eé]sum[eé]|cv)|references (are )?available (up)?on request\.?",
+    re.IGNORECASE
+)
+
+# Short lines among the first or last PAGE_EDGE_LINES of at least this many pages are page
+# headers and footers; only the first copy is kept. Pages are separated by form feeds (see
+# extract_pdf_text), and the same line elsewhere on a page is left alone.
+REPEATED_LINE_MIN_PAGES = 2
+REPEATED_LINE_MAX_LENGTH = 100
+PAGE_EDGE_LINES = 3
+
+# Resume sections by heading, in the order they are kept when a resume is over budget.
+# Text before the first recognized heading (name and contact details) always comes first.
+SECTION_PRIORITIES = [
+    ["skills", "technical skills", "core skills", "key skills", "core competencies", "competencies"],
+    [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "career history", "relevant experience"
+    ],
+    ["education", "academic background", "qualifications", "education and training"],
+    ["certifications", "certificates", "licenses", "licenses and certifications", "training"],
+    ["summary", "professional summary", "profile", "professional profile", "objective", "career objective", "about me"],
+    ["projects", "achievements", "awards", "publications", "languages", "volunteering", "volunteer experience"],
+    ["interests", "hobbies", "hobbies and interests", "references", "personal details", "additional information"]
+]
+_HEADINGS = {heading: priority + 1 for priority, headings in enumerate(SECTION_PRIORITIES) for heading in headings}
+
+TRIMMED_MARKER = "[trimmed]"
+
+# Characters every section is guaranteed (budget permitting) before the rest is shared out
+SECTION_MIN_CHARS = 400
+
+# Clean extracted resume text for prompting: normalize whitespace and extraction artifacts,
+# drop page numbers, repeated headers/footers and boilerplate, then trim to max_tokens
+# (0 or None keeps the full text) by keeping the most important sections first.
+# Returns (text, trimmed).
+def compact_resume(text, max_tokens=None):
+    text = _CONTROL_CHARS.sub("", (text or "").translate(_LIGATURES))
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # Words hyphenated across a line break
+    text = re.sub(r"([a-z])-\n([a-z])", r"\1\2", text)
+
+    pages = [[_SPACES.sub(" ", line).strip() for line in page.split("\n")] for page in text.split("\f")]
+
+    # Pages each short line opens or closes
+    edges = []
+    counts = {}
+    for lines in pages:
+        filled = [k for k, line in enumerate(lines) if line]
+        edge = set(filled[:PAGE_EDGE_LINES] + filled[-PAGE_EDGE_LINES:])
+        edges.append(edge)
+        for key in {lines[k].lower() for k in edge if len(lines[k]) <= REPEATED_LINE_MAX_LENGTH}:
+            counts[key] = counts.get(key, 0) + 1
+
+    kept = []
+    seen = set()
+    for lines, edge in zip(pages, edges):
+        for k, line in enumerate(lines):
+            key = line.lower()
+            if line and (_PAGE_NUMBER.fullmatch(line) or _NO_WORDS.fullmatch(line) or _BOILERPLATE.fullmatch(line)):
+                continue
+            if k in edge and counts.get(key, 0) >= REPEATED_LINE_MIN_PAGES:
+                if key in seen:
+                    continue
+                seen.add(key)
+            # At most one blank line in a row
+            if not line and (not kept or not kept[-1]):
+                continue
+            kept.append(line)
+
+    text = "\n".join(kept).strip()
+    if not max_tokens or len(text) <= max_tokens * CHARS_PER_TOKEN:
+        return text, False
+    return trim_sections(text, max_tokens * CHARS_PER_TOKEN), True
+
+def section_priority(line):
+    heading = line.strip().rstrip(":").strip().lower()
+    if len(heading) > 40:
+        return None
+    return _HEADINGS.get(heading)
+
+# Fit text into budget characters section by section, the header first and then sections in
+# SECTION_PRIORITIES order. Sections over their allowance are cut at a line break; those
+# that get nothing are left out. Kept sections stay in their original order.
+def trim_sections(text, budget):
+    sections = [[0, []]]
+    for line in text.split("\n"):
+        priority = section_priority(line)
+        if priority is not None:
+            sections.append([priority, []])
+        sections[-1][1].append(line)
+
+    blocks = ["\n".join(lines).strip() for _, lines in sections]
+    order = sorted(range(len(blocks)), key=lambda k: (sections[k][0], k))
+    allowed = [0] * len(blocks)
+    remaining = budget
+
+    # Every section gets a short share first, so a long experience section cannot crowd out
+    # education; whatever is left then goes to sections in priority order
+    for share in (SECTION_MIN_CHARS, budget):
+        for index in order:
+            grant = min(len(blocks[index]) - allowed[index], share - allowed[index], remaining)
+            if grant > 0:
+                if not allowed[index]:
+                    remaining -= 2  # Blank line between sections
+                allowed[index] += grant
+                remaining -= grant
+
+    kept = []
+    for block, limit in zip(blocks, allowed):
+        if not block or limit <= 0:
+            continue
+        if limit < len(block):
+            # Prefer a line break, then a word break, so no line ends mid-word
+            cut = block.rfind("\n", 0, limit)
+            if cut < limit // 2:
+                cut = block.rfind(" ", 0, limit)
+            block = block[:cut if cut > 0 else limit].rstrip() + "\n" + TRIMMED_MARKER
+        kept.append(block)
+    return "\n\n".join(kept)
+
+# Process-wide totals of what compaction saved, in estimated tokens
+class CompactionStats:
+    def __init__(self):
+        self.resumes = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.trimmed = 0
+        self._lock = threading.Lock()
+
+    def record(self, original, compacted, trimmed):
+        with self._lock:
+            self.resumes += 1
+            self.tokens_before += estimate_tokens(original)
+            self.tokens_after += estimate_tokens(compacted)
+            self.trimmed += trimmed
+
+    def stats(self):
+        saved = self.tokens_before - self.tokens_after
+        return {
+            "resumes": self.resumes,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": saved,
+            "saved_percent": round(100 * saved / self.tokens_before) if self.tokens_before else 0,
+            "trimmed": self.trimmed
+        }
@@ -0,0 +1,105 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Gemini model used by all agents
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Base generation config for every model call; unset values keep the API defaults
+GEMINI_GENERATION_CONFIG = {
+    name: cast(os.getenv(env_var))
+    for name, env_var, cast in [
+        ("temperature", "GEMINI_TEMPERATURE", float),
+        ("top_p", "GEMINI_TOP_P", float),
+        ("top_k", "GEMINI_TOP_K", int),
+        ("max_output_tokens", "GEMINI_MAX_OUTPUT_TOKENS", int)
+    ]
+    if os.getenv(env_var)
+}
+
+# Maximum number of resumes analyzed in parallel
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "8"))
+
+# Batched analysis: resumes packed per request, bounded by an estimated input token budget (0 disables batching)
+ANALYSIS_BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", "12000"))
+ANALYSIS_BATCH_MAX_SIZE = int(os.getenv("ANALYSIS_BATCH_MAX_SIZE", "8"))
+# Every evaluation in a batched answer must also fit the model's output limit
+# (GEMINI_MAX_OUTPUT_TOKENS when set, otherwise ANALYSIS_BATCH_OUTPUT_TOKENS)
+ANALYSIS_OUTPUT_TOKENS = int(os.getenv("ANALYSIS_OUTPUT_TOKENS", "700"))
+ANALYSIS_BATCH_OUTPUT_TOKENS = int(os.getenv("ANALYSIS_BATCH_OUTPUT_TOKENS", "8192"))
+
+# Resume extraction settings (0 disables a cap)
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "30")) or None
+MAX_PDF_CHARS = int(os.getenv("MAX_PDF_CHARS", "50000")) or None
+
+# Estimated tokens of resume text sent per candidate after compaction; longer resumes keep
+# their header, skills and experience first (0 disables trimming, cleanup still applies)
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+
+# Process-wide Gemini rate limits (0 disables a limit); set them to your API tier's quota.
+# Quota and transient server errors are retried with exponential backoff and jitter.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "60"))
+
+# Local skills pre-screen run before the model: pairs scoring below the cutoff (0-100) are
+# either scored locally and never sent ("skip") or sent after everything else ("defer").
+# A cutoff of 0 disables the pre-screen.
+PRESCREEN_CUTOFF = int(os.getenv("PRESCREEN_CUTOFF", "10"))
+PRESCREEN_MODE = os.getenv("PRESCREEN_MODE", "defer").lower()
+
+# Resumes whose estimated text similarity (MinHash Jaccard, 0-1) reaches this, and whose
+# email address and name agree, are treated as one candidate and analyzed once. Exact copies
+# are always merged; 0 merges only those.
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", "0.9"))
+
+# Server-side context caching for the shared job-requirements prefix. Gemini only caches
+# prefixes above a minimum size; smaller prefixes are sent inline with every request.
+USE_CONTEXT_CACHE = os.getenv("USE_CONTEXT_CACHE", "true").lower() == "true"
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "32768"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# Persistent result cache settings
+CACHE_DB_PATH = os.getenv("EZHUNT_CACHE_DB", "ezhunt_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_AGE_DAYS = int(os.getenv("CACHE_MAX_AGE_DAYS", "30"))
+
+# Persistent store for runs: candidates, analyses, shortlists and interview status
+STORE_DB_PATH = os.getenv("EZHUNT_STORE_DB", "ezhunt_store.db")
+
+# Candidate cards rendered per page in Step 4
+CANDIDATES_PER_PAGE = int(os.getenv("CANDIDATES_PER_PAGE", "20"))
+
+# Interview invitations: "template" renders the fixed parts locally and asks the model only
+# for a short fit paragraph, INVITATION_BATCH_SIZE candidates per request; "model" has the
+# model write each whole email
+INVITATION_MODE = os.getenv("INVITATION_MODE", "template").lower()
+INVITATION_BATCH_SIZE = int(os.getenv("INVITATION_BATCH_SIZE", "10"))
+
+# Outgoing mail for interview invitations. EMAIL_ADDRESS is the sender and, with
+# EMAIL_PASSWORD, the SMTP login; without a password no login is attempted (e.g. a local
+# test server). One connection is reused for a whole batch of invitations.
+EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS", "")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD", "")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+EMAILS_PER_MINUTE = int(os.getenv("EMAILS_PER_MINUTE", "20"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))
+
+# Metrics export: a Prometheus text file rewritten after every app run and batch, and/or a
+# local HTTP endpoint serving /metrics (port 0 disables it)
+METRICS_FILE = os.getenv("EZHUNT_METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("EZHUNT_METRICS_PORT", "0"))
+
+# Bump when a prompt changes so stale cached results are ignored
+CV_ANALYSIS_PROMPT_VERSION = "4"
+JD_SUMMARY_PROMPT_VERSION = "2"
+
+# Bump when the local pre-screen scoring changes, so checkpointed runs are not restored
+PRESCREEN_VERSION = "2"
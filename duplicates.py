@@ -0,0 +1,106 @@
+import numpy as np
+
+from cache import normalize_text
+from checkpoint import candidate_id_for
+from screening import find_email, guess_candidate_name
+from similarity import ngram_hashes
+
+# MinHash over character shingles of the whitespace-normalized text. 128 permutations split
+# into 32 bands of 4 rows: resumes sharing any band are compared, which catches pairs down
+# to roughly 0.4 Jaccard similarity before the threshold check.
+SHINGLE_SIZE = 9
+NUM_PERMUTATIONS = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# (a * x + b) mod 2^32 with odd a is a permutation of 32-bit shingle hashes; uint32
+# arithmetic wraps, so the modulo is free. Fixed seed so signatures are comparable across runs.
+_random = np.random.RandomState(20240601)
+_A = (_random.randint(0, 2 ** 31, NUM_PERMUTATIONS, dtype=np.int64) * 2 + 1).astype(np.uint32)
+_B = _random.randint(0, 2 ** 32, NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint32)
+
+# MinHash signature of a resume, or None when it has no text to compare
+def minhash_signature(text):
+    shingles = np.unique(ngram_hashes(normalize_text(text), SHINGLE_SIZE))
+    if not len(shingles):
+        return None
+
+    signature = np.empty(NUM_PERMUTATIONS, dtype=np.uint32)
+    # A few permutations at a time keeps memory flat for long resumes
+    for start in range(0, NUM_PERMUTATIONS, 16):
+        block = _A[start:start + 16, None] * shingles + _B[start:start + 16, None]
+        signature[start:start + 16] = block.min(axis=1)
+    return signature
+
+# Estimated Jaccard similarity of two signatures
+def signature_similarity(a, b):
+    return float(np.mean(a == b))
+
+# Who a resume belongs to, as far as the text says: its email address and name. Resumes built
+# from the same template differ in little else, so near copies are only merged when these agree.
+def resume_identity(text):
+    email = find_email(text)
+    return (email.lower() if email else None, guess_candidate_name(text or ""))
+
+# Group identical and near-identical resumes (estimated Jaccard >= threshold; 0 only merges
+# exact copies). Returns one list of indices per distinct candidate, in order of first
+# appearance. The first index of each group is its representative: the copy with the
+# smallest candidate ID, so the same files give the same ID in any upload order.
+# Near copies whose email address or name differs (different people using the same
+# template) are kept apart. Resumes without text, and the indices in separate (e.g. files
+# whose text is only an extraction error or the image-PDF placeholder), are never merged.
+def group_duplicates(cv_texts, threshold, separate=()):
+    parent = list(range(len(cv_texts)))
+    separate = set(separate)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        parent[max(find(i), find(j))] = min(find(i), find(j))
+
+    # Exact copies: same text once whitespace is normalized
+    first_copy = {}
+    for i, text in enumerate(cv_texts):
+        key = normalize_text(text)
+        if not key or i in separate:
+            continue
+        if key in first_copy:
+            union(first_copy[key], i)
+        else:
+            first_copy[key] = i
+
+    # Near copies: locality-sensitive hashing on signature bands, confirmed on the full signature
+    if threshold > 0:
+        signatures = {}
+        identities = {}
+        buckets = {}
+        for i in first_copy.values():
+            signature = minhash_signature(cv_texts[i])
+            if signature is None:
+                continue
+            signatures[i] = signature
+            identities[i] = resume_identity(cv_texts[i])
+
+            for band in range(BANDS):
+                key = (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+                for j in buckets.setdefault(key, []):
+                    if (
+                        find(i) != find(j) and identities[i] == identities[j]
+                        and signature_similarity(signature, signatures[j]) >= threshold
+                    ):
+                        union(i, j)
+                buckets[key].append(i)
+
+    groups = {}
+    for i in range(len(cv_texts)):
+        groups.setdefault(find(i), []).append(i)
+
+    result = []
+    for members in groups.values():
+        representative = min(members, key=lambda i: (candidate_id_for(cv_texts[i]), i))
+        result.append([representative] + [i for i in members if i != representative])
+    return sorted(result, key=min)
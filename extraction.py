@@ -0,0 +1,106 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2 as pdf
+
+from metrics import metrics
+from progress import COMPLETED, FAILED, STARTED, progress_event
+
+IMAGE_PDF_MESSAGE = "This appears to be an image-based PDF. Please provide a text-based PDF or manually enter the content."
+EXTRACTION_ERROR_PREFIX = "Error extracting text from PDF: "
+
+# Extract text from PDF bytes page by page, stopping at the page/character caps.
+# Runs inside worker processes, so it only takes and returns plain picklable data.
+def extract_pdf_text(data, max_pages=None, max_chars=None):
+    start = time.perf_counter()
+    pages = []
+    page_count = 0
+    char_count = 0
+    error = None
+
+    try:
+        reader = pdf.PdfReader(io.BytesIO(data))
+        for page in reader.pages:
+            if max_pages is not None and page_count >= max_pages:
+                break
+
+            page_text = page.extract_text() or ""  # Handle None case
+            pages.append(page_text)
+            page_count += 1
+            char_count += len(page_text)
+
+            if max_chars is not None and char_count >= max_chars:
+                break
+
+        # Pages stay separated by form feeds so compaction can tell page headers and footers apart
+        text = "\f".join(pages).strip()
+        if max_chars is not None:
+            text = text[:max_chars]
+
+        if not text:
+            # If no text was extracted (possibly an image-based PDF)
+            text = IMAGE_PDF_MESSAGE
+    except Exception as e:
+        error = str(e)
+        text = f"{EXTRACTION_ERROR_PREFIX}{error}"
+
+    return {
+        "text": text,
+        "pages": page_count,
+        "seconds": time.perf_counter() - start,
+        "error": error
+    }
+
+# Whether text is resume content, rather than empty, the image-PDF placeholder or an
+# extraction error message
+def is_resume_text(text):
+    return bool((text or "").strip()) and text != IMAGE_PDF_MESSAGE and not text.startswith(EXTRACTION_ERROR_PREFIX)
+
+# Whether an extraction result holds resume text
+def has_resume_text(result):
+    return not result["error"] and is_resume_text(result["text"])
+
+# Extract a batch of (name, bytes) files in parallel, keeping input order.
+# Progress events are published through on_event on the calling thread.
+def extract_pdf_texts(files, max_workers=None, max_pages=None, max_chars=None, on_event=None):
+    results = [None] * len(files)
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(files) or 1))
+
+    def publish(status, index, result=None):
+        if on_event:
+            latency = result["seconds"] if result else None
+            error = result["error"] if result else None
+            on_event(progress_event("extraction", status, files[index][0], latency, error))
+
+    def record(index, result):
+        result["name"] = files[index][0]
+        results[index] = result
+        metrics.record_stage("pdf_extraction", result["seconds"], "error" if result["error"] else "ok")
+        publish(FAILED if result["error"] else COMPLETED, index, result)
+
+    # Small batches are not worth the cost of starting worker processes
+    use_pool = max_workers > 1 and len(files) > 1
+    if use_pool:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for i, (name, data) in enumerate(files):
+                    futures[executor.submit(extract_pdf_text, data, max_pages, max_chars)] = i
+                    publish(STARTED, i)  # Dispatched to the pool
+
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+        except (BrokenProcessPool, OSError):
+            # A worker died or processes are unavailable; finish the rest in-process
+            pass
+
+    for i, (name, data) in enumerate(files):
+        if results[i] is None:
+            if not use_pool:
+                publish(STARTED, i)
+            record(i, extract_pdf_text(data, max_pages, max_chars))
+
+    return results
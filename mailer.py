@@ -0,0 +1,208 @@
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from metrics import metrics
+from ratelimit import TokenBucket, backoff_delay
+from screening import find_email
+
+QUEUED = "Queued"
+SENT = "Sent"
+DELIVERY_FAILED = "Delivery Failed"
+UNDELIVERABLE = "Undeliverable"
+
+# SMTP replies in the 4xx range are temporary by definition; dropped connections and
+# network errors are worth another attempt too. SMTPException subclasses OSError, so any
+# other SMTP error (e.g. an unsupported command) is classified before the network fallback.
+def is_transient(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+# Readable reason for a failed delivery, e.g. "550 no such user"
+def error_message(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        code, reply = next(iter(error.recipients.values()))
+        return f"{code} {_decode(reply)}"
+    if isinstance(error, smtplib.SMTPResponseException):
+        return f"{error.smtp_code} {_decode(error.smtp_error)}"
+    return str(error) or type(error).__name__
+
+def _decode(reply):
+    return reply.decode("utf-8", "replace") if isinstance(reply, bytes) else str(reply)
+
+# Address to send a generated invitation to. The draft's recipient is the candidate's contact
+# details as analyzed ("alex@x.com, (555) 123-4567", "Not provided"), so only the email
+# address in it is used; None when there is none.
+def recipient_address(email_data):
+    return find_email(email_data.get("candidate_email"))
+
+# Plain-text message for a generated invitation (see generate_interview_email); check
+# recipient_address first
+def build_invitation_message(email_data, sender):
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = recipient_address(email_data)
+    message["Subject"] = email_data["email_subject"]
+    message.set_content(email_data["email_body"].strip())
+    return message
+
+# Background delivery for invitations, shared by every Streamlit session in the process.
+# One worker thread sends queued messages over a single authenticated SMTP connection,
+# reused until the queue has been idle for idle_seconds. Sends are throttled to
+# per_minute (0 disables the limit) and transient failures are retried with backoff.
+# on_status(key, status, error) is called from the worker thread as each message moves on.
+class DeliveryQueue:
+    def __init__(self, host, port, username=None, password=None, use_tls=True, per_minute=20,
+                 max_retries=3, base_delay=2.0, max_delay=60.0, idle_seconds=30.0, timeout=30.0,
+                 on_status=None, smtp_factory=smtplib.SMTP, clock=time.monotonic, sleep=time.sleep):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.bucket = TokenBucket(per_minute, clock) if per_minute > 0 else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.on_status = on_status
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.connections = 0
+        self.errors = {}
+        self._smtp_factory = smtp_factory
+        self._sleep = sleep
+        self._smtp = None
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # Queue a message under key (e.g. run, job and candidate). A key already waiting is not
+    # queued twice; returns whether the message was added.
+    def enqueue(self, key, message):
+        with self._lock:
+            # A worker that died leaves its messages queued; a new one picks them up
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="smtp-delivery", daemon=True)
+                self._worker.start()
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self.errors.pop(key, None)
+        self._report(key, QUEUED)
+        self._queue.put((key, message))
+        return True
+
+    # Block until everything queued so far has been sent or has failed
+    def join(self):
+        self._queue.join()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    # Whether a message for key is waiting with a live worker to send it. A key stored as
+    # Queued that is not pending here (e.g. after a restart) was never sent.
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending and self._worker is not None and self._worker.is_alive()
+
+    def _run(self):
+        while True:
+            try:
+                key, message = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._disconnect()
+                continue
+
+            start = time.perf_counter()
+            error = self._deliver(message)
+            with self._lock:
+                self._pending.discard(key)
+                if error:
+                    self.failed += 1
+                    self.errors[key] = error
+                else:
+                    self.sent += 1
+            metrics.record_stage("email_delivery", time.perf_counter() - start, "error" if error else "ok")
+            try:
+                self._report(key, DELIVERY_FAILED if error else SENT, error)
+            finally:
+                self._queue.task_done()
+
+    # Returns None once the message is accepted, otherwise the final error message
+    def _deliver(self, message):
+        attempt = 0
+        while True:
+            self._throttle()
+            try:
+                self._connection().send_message(message)
+                return None
+            except Exception as e:
+                # A failed exchange can leave the session in an unknown state
+                self._disconnect()
+                if attempt >= self.max_retries or not is_transient(e):
+                    return error_message(e)
+                with self._lock:
+                    self.retries += 1
+                self._sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+                attempt += 1
+
+    def _throttle(self):
+        if self.bucket is None:
+            return
+        wait = self.bucket.wait_time(1)
+        while wait > 0:
+            self._sleep(wait)
+            wait = self.bucket.wait_time(1)
+        self.bucket.take(1)
+
+    def _connection(self):
+        if self._smtp is None:
+            smtp = self._smtp_factory(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username and self.password:
+                    smtp.login(self.username, self.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            with self._lock:
+                self.connections += 1
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def _report(self, key, status, error=None):
+        if self.on_status:
+            self.on_status(key, status, error)
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "connections": self.connections
+        }
@@ -0,0 +1,197 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from a cached lookup up to a slow model call with retries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Process-wide counters and latency histograms, shared by every thread and Streamlit
+# session, exported in the Prometheus text format. Collectors add values other components
+# already track (cache hits, token usage) at export time.
+class Metrics:
+    def __init__(self, namespace="ezhunt", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._types = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, metric_type, help_text):
+        self._types[name] = (metric_type, help_text)
+
+    # collect() returns (name, labels, value) tuples for described counters and gauges
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # Time every call as a pipeline stage. Exceptions and results carrying an "error" key
+    # (the agents' failure convention) count as errors.
+    def instrument(self, stage):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = func(*args, **kwargs)
+                    outcome = "error" if isinstance(result, dict) and "error" in result else "ok"
+                    return result
+                finally:
+                    self.record_stage(stage, time.perf_counter() - start, outcome)
+            return wrapper
+        return decorate
+
+    def record_stage(self, stage, seconds, outcome):
+        self.observe("stage_duration_seconds", seconds, stage=stage)
+        self.inc("stage_calls_total", stage=stage, outcome=outcome)
+
+    def counters(self, name):
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    # Count, mean and approximate percentiles (bucket upper bounds) per label set
+    def histogram_summary(self, name):
+        with self._lock:
+            histograms = {
+                labels: dict(histogram, buckets=list(histogram["buckets"]))
+                for (metric, labels), histogram in self._histograms.items() if metric == name
+            }
+
+        summary = {}
+        for labels, histogram in histograms.items():
+            count = histogram["count"]
+            summary[labels] = {
+                "count": count,
+                "mean": histogram["sum"] / count if count else 0.0,
+                "p50": self._quantile(histogram, 0.5),
+                "p95": self._quantile(histogram, 0.95)
+            }
+        return summary
+
+    def _quantile(self, histogram, q):
+        target = q * histogram["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, histogram["buckets"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    # Prometheus text exposition format
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: dict(value, buckets=list(value["buckets"])) for key, value in self._histograms.items()}
+
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                counters[(name, tuple(sorted(labels.items())))] = value
+
+        lines = []
+        for name in sorted(set(metric for metric, _ in counters) | set(metric for metric, _ in histograms)):
+            metric_type, help_text = self._types.get(name, ("untyped", name))
+            full_name = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram["buckets"]):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    # Write the metrics for a file-based scraper (e.g. node_exporter's textfile collector);
+    # the rename keeps readers from seeing a half-written file
+    def write_file(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+    # Serve GET /metrics from a daemon thread; returns the server
+    def serve(self, port, host="127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Shared by the app, the batch runner and the agents
+metrics = Metrics()
+metrics.describe("stage_duration_seconds", "histogram", "Latency of pipeline stages (PDF extraction, JD summary, CV analysis, email)")
+metrics.describe("stage_calls_total", "counter", "Pipeline stage calls by outcome")
+metrics.describe("step_render_seconds", "histogram", "Time to render a wizard step")
+metrics.describe("json_repairs_total", "counter", "Model answers that failed schema validation, by whether the repair retry fixed them")
+metrics.describe("fallbacks_total", "counter", "Results produced by a local fallback instead of the model")
+metrics.describe("cache_requests_total", "counter", "Result cache lookups by cache and result")
+metrics.describe("model_calls_total", "counter", "Model requests sent, retries included")
+metrics.describe("model_retries_total", "counter", "Model requests retried after quota or transient errors")
+metrics.describe("model_throttled_seconds_total", "counter", "Seconds callers waited on the rate limiter")
+metrics.describe("model_tokens_total", "counter", "Estimated model tokens by direction")
+metrics.describe("resume_tokens_saved_total", "counter", "Estimated resume tokens removed by compaction")
@@ -0,0 +1,50 @@
+import threading
+
+import google.generativeai as genai
+
+# Process-wide Gemini setup. The SDK is configured once (reconfiguring drops its clients and
+# their open connections), and one GenerativeModel is built per (model name, generation
+# config) and reused by every thread and Streamlit session. All models share the SDK's
+# default client, so the transport and its handshake are set up once per process.
+class ModelRegistry:
+    def __init__(self, api_key, default_model, generation_config=None):
+        self.api_key = api_key
+        self.default_model = default_model
+        self.generation_config = dict(generation_config or {})
+        self._configured = False
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def configure(self):
+        with self._lock:
+            self._configure()
+
+    def _configure(self):
+        if not self._configured:
+            genai.configure(api_key=self.api_key)
+            self._configured = True
+
+    # Shared model with the base generation config plus any overrides; per-call configs
+    # passed to generate_content are merged on top by the SDK
+    def get(self, model_name=None, **overrides):
+        model_name = model_name or self.default_model
+        generation_config = dict(self.generation_config, **overrides)
+        key = (model_name, tuple(sorted(generation_config.items())))
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                self._configure()
+                model = genai.GenerativeModel(model_name, generation_config=generation_config or None)
+                self._models[key] = model
+            return model
+
+    # Model bound to server-side cached content; these are owned by the caller's cache
+    def from_cached_content(self, cached_content):
+        self.configure()
+        return genai.GenerativeModel.from_cached_content(
+            cached_content, generation_config=self.generation_config or None
+        )
+
+    def stats(self):
+        return {"models": len(self._models)}
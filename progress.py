@@ -0,0 +1,92 @@
+import time
+
+# Event statuses published by pipeline stages
+STARTED = "started"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Build a progress event for one item of a pipeline stage
+def progress_event(stage, status, item=None, latency=None, error=None):
+    return {
+        "stage": stage,
+        "status": status,
+        "item": item,
+        "latency": latency,
+        "error": error,
+        "timestamp": time.time()
+    }
+
+# Run func as one item of a stage, publishing started and completed/failed events.
+# Results carrying an "error" key count as failures, matching the agents' convention.
+def run_with_events(stage, item, on_event, func, *args, **kwargs):
+    if on_event:
+        on_event(progress_event(stage, STARTED, item))
+
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        if on_event:
+            on_event(progress_event(stage, FAILED, item, time.perf_counter() - start, str(e)))
+        raise
+
+    if on_event:
+        error = result.get("error") if isinstance(result, dict) else None
+        status = FAILED if error else COMPLETED
+        on_event(progress_event(stage, status, item, time.perf_counter() - start, error))
+
+    return result
+
+# Aggregates progress events into per-stage counts, latency and throughput
+class ProgressTracker:
+    def __init__(self, totals):
+        self.totals = dict(totals)
+        self.started = {stage: 0 for stage in self.totals}
+        self.completed = {stage: 0 for stage in self.totals}
+        self.failed = {stage: 0 for stage in self.totals}
+        self.latency = {stage: 0.0 for stage in self.totals}
+        self.first_started = {}
+        self.last_event = None
+
+    def record(self, event):
+        stage = event["stage"]
+        self.totals.setdefault(stage, 1)
+        for counts in (self.started, self.completed, self.failed, self.latency):
+            counts.setdefault(stage, 0)
+
+        if event["status"] == STARTED:
+            self.started[stage] += 1
+            self.first_started.setdefault(stage, event["timestamp"])
+        else:
+            if event["status"] == COMPLETED:
+                self.completed[stage] += 1
+            else:
+                self.failed[stage] += 1
+            self.latency[stage] += event["latency"] or 0.0
+
+        self.last_event = event
+
+    def finished(self, stage):
+        return self.completed.get(stage, 0) + self.failed.get(stage, 0)
+
+    # Fraction of all items across all stages that have finished
+    def fraction(self):
+        total = sum(self.totals.values())
+        if not total:
+            return 1.0
+        return min(sum(self.finished(stage) for stage in self.totals) / total, 1.0)
+
+    def stage_summary(self, stage):
+        finished = self.finished(stage)
+        summary = f"{stage.capitalize()}: {finished}/{self.totals.get(stage, 0)} done"
+
+        if self.failed.get(stage):
+            summary += f", {self.failed[stage]} failed"
+
+        if finished:
+            summary += f" · avg {self.latency[stage] / finished:.2f}s"
+            elapsed = time.time() - self.first_started.get(stage, time.time())
+            if elapsed > 0:
+                summary += f" · {finished / elapsed:.1f}/s"
+
+        return summary
@@ -0,0 +1,150 @@
+import random
+import re
+import threading
+import time
+
+# HTTP statuses worth retrying: quota (429) and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Token bucket refilled continuously at rate_per_minute / 60 per second, holding at most a
+# minute's worth. The level may go negative when actual usage exceeds what was reserved.
+class TokenBucket:
+    def __init__(self, rate_per_minute, clock=time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    # Seconds until amount can be taken (0 when it is available now)
+    def wait_time(self, amount):
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+# Process-wide limiter for model requests, shared by every thread and Streamlit session.
+# Requests per minute and tokens per minute each get a bucket; 0 disables either limit.
+class RateLimiter:
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        # Estimated tokens of every request sent (retries included) and of every response
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._blocked_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    # Block until one request carrying the estimated input tokens fits under both limits
+    def acquire(self, tokens=0):
+        while True:
+            with self._lock:
+                wait = self._blocked_until - self._clock()
+                if self.requests:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens:
+                    wait = max(wait, self.tokens.wait_time(tokens))
+
+                if wait <= 0:
+                    self.calls += 1
+                    self.input_tokens += tokens
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return
+                self.throttled_seconds += min(wait, 1.0)
+
+            # Re-check at least once a second so a freed-up bucket is noticed promptly
+            self._sleep(min(wait, 1.0))
+
+    # Charge tokens that were only known after the call (the response)
+    def consume(self, tokens):
+        with self._lock:
+            self.output_tokens += tokens
+            if self.tokens and tokens:
+                self.tokens.take(tokens)
+
+    # Hold every caller back after a quota error, not just the thread that hit it
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    # Call func under the limiter, retrying retryable errors up to max_retries times. Quota
+    # errors pause the whole limiter for the server's retry-after hint (or the backoff delay);
+    # other transient errors only delay this caller.
+    def call(self, func, tokens=0, max_retries=5, base_delay=1.0, max_delay=60.0):
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                return func()
+            except Exception as e:
+                if attempt >= max_retries or not is_retryable(e):
+                    raise
+
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, base_delay, max_delay)
+
+                with self._lock:
+                    self.retries += 1
+                if status_code_of(e) == 429:
+                    self.pause(delay)
+                else:
+                    self._sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        return {
+            "retries": self.retries,
+            "throttled_seconds": round(self.throttled_seconds, 1),
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tokens_per_call": round(self.input_tokens / self.calls) if self.calls else 0
+        }
+
+def status_code_of(error):
+    code = getattr(error, "code", None)
+    return int(code) if isinstance(code, int) else None
+
+def is_retryable(error):
+    return status_code_of(error) in RETRYABLE_STATUS_CODES or isinstance(error, (TimeoutError, ConnectionError))
+
+# Server-provided wait before retrying, in seconds: a RetryInfo detail, a Retry-After
+# header, or the hint in the error message. None when the error carries no hint.
+def retry_after_seconds(error):
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header and header.strip().isdigit():
+        return float(header)
+
+    match = re.search(r"retry[ _]in ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+# Exponential backoff with full jitter
+def backoff_delay(attempt, base_delay, max_delay):
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
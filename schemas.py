@@ -0,0 +1,217 @@
+import copy
+import json
+import re
+
+from google.generativeai.types import GenerationConfig
+
+# Declared output schemas for the JSON agents, in the OpenAPI subset Gemini accepts as a
+# response schema. "default" fills optional fields the model left out; "format": "percent"
+# marks "NN%" strings, which the rest of the app parses with int(value.strip("%")).
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+PERCENT = {"type": "string", "format": "percent"}
+
+JD_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "JobTitle": {"type": "string"},
+        "Department": {"type": "string", "default": "Not specified"},
+        "Location": {"type": "string", "default": "Not specified"},
+        "EmploymentType": {"type": "string", "default": "Not specified"},
+        "RequiredSkills": STRING_LIST,
+        "RequiredExperience": {"type": "string", "default": "Not specified"},
+        "RequiredQualifications": dict(STRING_LIST, default=[]),
+        "Responsibilities": dict(STRING_LIST, default=[]),
+        "SalaryRange": {"type": "string", "default": "Not specified"},
+        "PreferredSkills": dict(STRING_LIST, default=[])
+    },
+    "required": ["JobTitle", "RequiredSkills"]
+}
+
+CV_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "CandidateName": {"type": "string"},
+        "ContactInfo": {"type": "string", "default": "Not provided"},
+        "Skills": dict(STRING_LIST, default=[]),
+        "Experience": dict(STRING_LIST, default=[]),
+        "Education": dict(STRING_LIST, default=[]),
+        "Certifications": dict(STRING_LIST, default=[]),
+        "SkillMatch": PERCENT,
+        "ExperienceMatch": PERCENT,
+        "QualificationMatch": PERCENT,
+        "OverallMatch": PERCENT,
+        "MatchedSkills": dict(STRING_LIST, default=[]),
+        "MissingSkills": dict(STRING_LIST, default=[]),
+        "Strengths": dict(STRING_LIST, default=[]),
+        "Areas_for_Improvement": dict(STRING_LIST, default=[]),
+        "Recommendation": {"type": "string", "enum": ["shortlist", "reject", "further review"]}
+    },
+    "required": [
+        "CandidateName", "SkillMatch", "ExperienceMatch", "QualificationMatch", "OverallMatch", "Recommendation"
+    ]
+}
+
+# Batched analysis: one evaluation per candidate, tagged with the candidate number
+CV_ANALYSIS_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": dict(CV_ANALYSIS_SCHEMA["properties"], CandidateId={"type": "integer"}),
+        "required": CV_ANALYSIS_SCHEMA["required"] + ["CandidateId"]
+    }
+}
+
+# Batched "why you're a fit" paragraphs for interview invitations, tagged with the invitee number
+FIT_PARAGRAPH_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"CandidateId": {"type": "integer"}, "Paragraph": {"type": "string"}},
+        "required": ["CandidateId", "Paragraph"]
+    }
+}
+
+# Keywords the API's response schema does not accept
+_LOCAL_KEYWORDS = {"default", "format", "enum"}
+
+# Generation settings that ask the model for JSON matching the schema. Older SDKs without
+# structured output get None and rely on the prompt plus validation and repair below.
+def json_generation_config(schema):
+    fields = getattr(GenerationConfig, "__dataclass_fields__", {})
+    if "response_mime_type" not in fields:
+        return None
+
+    config = {"response_mime_type": "application/json"}
+    if "response_schema" in fields:
+        config["response_schema"] = _api_schema(schema)
+    return config
+
+def _api_schema(schema):
+    if isinstance(schema, dict):
+        return {key: _api_schema(value) for key, value in schema.items() if key not in _LOCAL_KEYWORDS}
+    return schema
+
+# Strip code fences and surrounding prose from a model response holding JSON
+def clean_json_response(response_text, opener="{", closer="}"):
+    response_text = response_text.strip()
+
+    # Handle different response formats
+    if response_text.startswith("```json") and response_text.endswith("```"):
+        response_text = response_text[7:-3].strip()
+    elif response_text.startswith("```") and response_text.endswith("```"):
+        response_text = response_text[3:-3].strip()
+
+    # If the response still contains non-JSON text, try to extract JSON portion
+    if not response_text.startswith(opener):
+        start_index = response_text.find(opener)
+        end_index = response_text.rfind(closer)
+
+        if start_index >= 0 and end_index >= 0:
+            response_text = response_text[start_index:end_index+1]
+
+    return response_text
+
+# Decode the JSON value of a model response; raises json.JSONDecodeError
+def load_json(text, schema):
+    opener, closer = ("[", "]") if schema["type"] == "array" else ("{", "}")
+    return json.loads(clean_json_response(text or "", opener, closer))
+
+# Complete items of a JSON array that was cut off, e.g. at the output token limit; the
+# unfinished last item is dropped
+def load_json_items(text):
+    text = text or ""
+    start = text.find("[")
+    if start < 0:
+        return []
+
+    decoder = json.JSONDecoder()
+    items = []
+    position = start + 1
+    while True:
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text) or text[position] == "]":
+            return items
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            return items
+        items.append(item)
+
+# Parse and validate model output; returns (value, errors). Values are coerced where the
+# intent is unambiguous (75 -> "75%", "Shortlist" -> "shortlist", "SQL" -> ["SQL"]).
+def parse_structured(text, schema):
+    try:
+        value = load_json(text, schema)
+    except json.JSONDecodeError as e:
+        return None, [f"response is not valid JSON ({e.msg})"]
+
+    errors = []
+    value = validate(value, schema, "$", errors)
+    return value, errors
+
+def validate(value, schema, path, errors):
+    expected = schema["type"]
+
+    if expected == "object":
+        if not isinstance(value, dict):
+            errors.append(f"{path} must be an object")
+            return value
+        result = dict(value)
+        for name, field_schema in schema.get("properties", {}).items():
+            if name in value and value[name] is not None:
+                result[name] = validate(value[name], field_schema, f"{path}.{name}", errors)
+            elif name in schema.get("required", []):
+                errors.append(f"{path}.{name} is required")
+            elif "default" in field_schema:
+                result[name] = copy.deepcopy(field_schema["default"])
+        return result
+
+    if expected == "array":
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            errors.append(f"{path} must be an array")
+            return value
+        return [validate(item, schema["items"], f"{path}[{i}]", errors) for i, item in enumerate(value)]
+
+    if expected == "integer":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            errors.append(f"{path} must be an integer")
+            return value
+
+    # Strings
+    if isinstance(value, (dict, list)):
+        errors.append(f"{path} must be a string")
+        return value
+    if schema.get("format") == "percent":
+        return _percent(value, path, errors)
+
+    value = str(value).strip()
+    if "enum" in schema:
+        normalized = value.lower().replace("_", " ")
+        if normalized not in schema["enum"]:
+            errors.append(f"{path} must be one of {', '.join(schema['enum'])}")
+        return normalized
+    return value
+
+def _percent(value, path, errors):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*%?\s*", str(value))
+    if not match:
+        errors.append(f'{path} must be a percentage like "75%"')
+        return value
+    return f"{min(100, max(0, round(float(match.group(1)))))}%"
+
+# Follow-up instruction for the one repair attempt: the rejected answer and exactly what was wrong
+def repair_prompt(previous_text, errors):
+    problems = "\n".join(f"    - {error}" for error in errors[:10])
+    return f"""
+    Your previous answer was:
+    {(previous_text or "")[:4000]}
+    
+    It could not be used:
+{problems}
+    Answer again with ONLY the corrected JSON, following the field list above exactly.
+    """
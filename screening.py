@@ -0,0 +1,134 @@
+import re
+
+from similarity import SimilarityIndex
+
+# Best-effort name and contact extraction straight from resume text
+def guess_candidate_name(cv_text):
+    name_match = re.search(r"([A-Z][a-z]+ [A-Z][a-z]+)", cv_text[:500])
+    return name_match.group(1) if name_match else "Unknown Candidate"
+
+_EMAIL = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+# First email address in text (e.g. "alex@x.com, (555) 123-4567"), or None
+def find_email(text):
+    email_match = _EMAIL.search(text or "")
+    return email_match.group(0) if email_match else None
+
+def guess_contact_info(cv_text):
+    return find_email(cv_text) or "Not found"
+
+# Words that carry no skill meaning in JD skill phrases
+PRESCREEN_STOPWORDS = {
+    "a", "an", "and", "or", "the", "of", "in", "with", "for", "to", "on", "etc",
+    "experience", "knowledge", "understanding", "familiarity", "proficiency", "skills",
+    "strong", "advanced", "basic", "intermediate", "industry", "concepts", "tools"
+}
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9+#]+", (text or "").lower())
+
+# Crude suffix stripping so inflections meet ("stakeholders"/"stakeholder",
+# "methodologies"/"methodology", "managed"/"managing"/"manage"). Both sides of a
+# comparison go through it, so the stems only need to agree, not be words.
+def stem(token):
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies"):
+        token = token[:-3] + "y"
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    return token[:-1] if token.endswith("e") and len(token) > 3 else token
+
+# Split a skill phrase into alternatives ("Python or R", "Cloud (AWS, Azure)"), each a set of tokens
+def skill_alternatives(skill):
+    parts = re.split(r"\b(?:or|and)\b|/|,|\(|\)", skill.lower())
+    alternatives = []
+    for part in parts:
+        tokens = frozenset(stem(t) for t in tokenize(part) if t not in PRESCREEN_STOPWORDS)
+        if tokens:
+            alternatives.append(tokens)
+    return alternatives
+
+# Inverted index from skill tokens to the JD skill alternatives that contain them.
+# Required skills weigh twice as much as preferred ones.
+def build_skill_index(jd_summary):
+    skills = [(skill, 2) for skill in jd_summary.get("RequiredSkills", [])]
+    skills += [(skill, 1) for skill in jd_summary.get("PreferredSkills", [])]
+    
+    alternatives = []
+    index = {}
+    for s, (skill, weight) in enumerate(skills):
+        alternatives.append(skill_alternatives(skill))
+        for a, tokens in enumerate(alternatives[s]):
+            for token in tokens:
+                index.setdefault(token, []).append((s, a))
+    
+    return {"skills": skills, "alternatives": alternatives, "index": index}
+
+# Score a resume 0-100 by the weighted share of JD skills found in its text. A skill counts
+# as matched when every token of one of its alternatives appears; partly matched skills
+# still add their share of tokens to the score.
+def prescreen_cv(cv_text, skill_index):
+    skills = skill_index["skills"]
+    if not skills:
+        return {"score": 100, "matched": [], "missing": []}
+    
+    # Count, per skill alternative, how many of its tokens the resume contains
+    found = {}
+    for token in {stem(t) for t in tokenize(cv_text)}:
+        for key in skill_index["index"].get(token, ()):
+            found[key] = found.get(key, 0) + 1
+    
+    matched, missing = [], []
+    score, total = 0, 0
+    for s, (skill, weight) in enumerate(skills):
+        total += weight
+        share = max(
+            (found.get((s, a), 0) / len(tokens) for a, tokens in enumerate(skill_index["alternatives"][s])),
+            default=0
+        )
+        score += weight * share
+        if share == 1:
+            matched.append(skill)
+        else:
+            missing.append(skill)
+    
+    return {"score": round(score * 100 / total), "matched": matched, "missing": missing}
+
+# Analysis result for a resume screened out locally, shaped like an analyze_cv result
+def prescreen_result(cv_text, screen):
+    return {
+        "CandidateName": guess_candidate_name(cv_text),
+        "ContactInfo": guess_contact_info(cv_text),
+        "Skills": screen["matched"],
+        "Experience": [],
+        "Education": [],
+        "Certifications": [],
+        "SkillMatch": f"{screen['score']}%",
+        "ExperienceMatch": "0%",
+        "QualificationMatch": "0%",
+        "OverallMatch": f"{screen['score']}%",
+        "MatchedSkills": screen["matched"],
+        "MissingSkills": screen["missing"],
+        "Strengths": [],
+        "Areas_for_Improvement": ["Few of the job's skills were found in the resume"],
+        "Recommendation": "reject",
+        "PreScreened": True
+    }
+
+# Text of a JD summary used as the similarity query
+def job_similarity_text(jd_summary):
+    parts = [jd_summary.get("JobTitle", ""), jd_summary.get("RequiredExperience", "")]
+    for field in ["RequiredSkills", "PreferredSkills", "RequiredQualifications", "Responsibilities"]:
+        parts.extend(jd_summary.get(field, []))
+    return " ".join(str(part) for part in parts)
+
+# Offline TF-IDF similarity of every resume to every job; returns matrix[job_index][candidate_index]
+def compute_similarity_matrix(cv_texts, job_summaries):
+    index = SimilarityIndex(cv_texts)
+    scores = index.scores([job_similarity_text(jd_summary) for jd_summary in job_summaries])
+    return scores.tolist()
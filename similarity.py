@@ -0,0 +1,87 @@
+import numpy as np
+
+# Hashed character n-gram vectors: no vocabulary, no network, no GPU
+DEFAULT_DIMS = 4096
+DEFAULT_NGRAM = 5
+
+# Bytes outside [a-z0-9] become spaces so n-grams only span normalized text
+_NORMALIZE_TABLE = bytes(c if (48 <= c <= 57 or 97 <= c <= 122) else 32 for c in range(256))
+
+# 32-bit hash of every character n-gram of the normalized text
+def ngram_hashes(text, n=DEFAULT_NGRAM):
+    data = (text or "").lower().encode("utf-8", "ignore").translate(_NORMALIZE_TABLE)
+    chars = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    if len(chars) < n:
+        return np.zeros(0, dtype=np.uint32)
+
+    # FNV-style hash of every n-gram at once, one shifted slice per position
+    hashes = np.zeros(len(chars) - n + 1, dtype=np.uint32)
+    for k in range(n):
+        hashes = hashes * np.uint32(16777619) ^ chars[k:len(chars) - n + 1 + k]
+    return hashes
+
+# Count hashed character n-grams of a text into a dense vector
+def hash_ngrams(text, dims=DEFAULT_DIMS, n=DEFAULT_NGRAM):
+    return np.bincount(ngram_hashes(text, n) % dims, minlength=dims).astype(np.float32)
+
+# Documents hashed and scored together; bounds the float32 temporaries to CHUNK_DOCUMENTS x dims
+CHUNK_DOCUMENTS = 256
+
+# TF-IDF index over a pool of documents. Raw n-gram counts are kept per chunk of documents as
+# uint8 (uint16 where a count does not fit), a quarter of the float32 matrix; term frequency,
+# idf and norms are applied while scoring, one matrix product per chunk
+class SimilarityIndex:
+    def __init__(self, texts, dims=DEFAULT_DIMS, n=DEFAULT_NGRAM):
+        self.dims = dims
+        self.n = n
+        self.size = len(texts)
+        self.chunks = [self._count(texts[start:start + CHUNK_DOCUMENTS]) for start in range(0, len(texts), CHUNK_DOCUMENTS)]
+
+        # Smoothed inverse document frequency
+        document_frequency = sum(np.count_nonzero(chunk, axis=0) for chunk in self.chunks)
+        self.idf = (np.log((1 + self.size) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    # Hashed n-gram counts of a chunk of documents, computed in one pass over their joined text
+    def _count(self, texts):
+        data = [(text or "").lower().encode("utf-8", "ignore").translate(_NORMALIZE_TABLE) for text in texts]
+        lengths = np.array([len(item) for item in data], dtype=np.int64)
+        chars = np.frombuffer(b"".join(data), dtype=np.uint8).astype(np.uint32)
+        keys = np.zeros(0, dtype=np.int64)
+        if len(chars) >= self.n:
+            positions = len(chars) - self.n + 1
+            # Same hash as ngram_hashes, updated in place
+            hashes = chars[:positions].copy()
+            for k in range(1, self.n):
+                hashes *= np.uint32(16777619)
+                hashes ^= chars[k:positions + k]
+            hashes %= np.uint32(self.dims)
+            keys = np.repeat(np.arange(len(texts), dtype=np.int64) * self.dims, lengths)[:positions]
+            keys += hashes
+
+            # N-grams that run from one document into the next go to a spare slot past the end
+            ends = np.cumsum(lengths)[:-1]
+            crossing = (ends[:, None] + np.arange(1 - self.n, 0)).ravel()
+            keys[crossing[(crossing >= 0) & (crossing < positions)]] = len(texts) * self.dims
+
+        counts = np.bincount(keys, minlength=len(texts) * self.dims + 1)[:-1].reshape(len(texts), self.dims)
+        count_type = np.uint8 if counts.max(initial=0) <= 0xFF else np.uint16
+        return np.minimum(counts, np.iinfo(count_type).max).astype(count_type)
+
+    def query_vector(self, text):
+        vector = np.log1p(hash_ngrams(text, self.dims, self.n)) * self.idf
+        return vector / (np.linalg.norm(vector) + 1e-9)
+
+    # Cosine similarity (0-1) of every document to each query; shape (queries, documents)
+    def scores(self, queries):
+        if not self.size or not len(queries):
+            return np.zeros((len(queries), self.size), dtype=np.float32)
+        weighted_queries = (np.vstack([self.query_vector(query) for query in queries]) * self.idf).T.astype(np.float32)
+        squared_idf = self.idf * self.idf
+
+        rows = []
+        for chunk in self.chunks:
+            # Sublinear term frequency; the document norm comes from the same pass
+            term_frequency = np.log1p(chunk, dtype=np.float32)
+            norms = np.sqrt(np.square(term_frequency) @ squared_idf)
+            rows.append((term_frequency @ weighted_queries) / (norms[:, None] + 1e-9))
+        return np.clip(np.concatenate(rows).T, 0.0, 1.0)
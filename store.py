@@ -0,0 +1,285 @@
+import json
+import sqlite3
+import threading
+import time
+
+from config import CACHE_MAX_AGE_DAYS
+
+# ORDER BY clauses for candidate_page
+CANDIDATE_ORDERS = {
+    "match_desc": "a.match DESC",
+    "match_asc": "a.match ASC",
+    "similarity_desc": "a.similarity IS NULL, a.similarity DESC",
+    "name": "a.name"
+}
+
+# Persistent home for screening runs, shared by every Streamlit session in the process.
+# Resume text, analyses, the shortlist and interview status live here keyed by run and
+# candidate ID; sessions only keep IDs and load what a page needs. Each session owns its
+# run IDs, so two recruiters screening the same resumes keep separate shortlists.
+class CandidateStore:
+    def __init__(self, db_path, max_age_days=CACHE_MAX_AGE_DAYS):
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY, job_summaries TEXT NOT NULL, created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS candidates (
+                    run_id TEXT NOT NULL, candidate_id TEXT NOT NULL, position INTEGER NOT NULL,
+                    name TEXT, text TEXT NOT NULL, extraction TEXT, similarity TEXT,
+                    PRIMARY KEY (run_id, candidate_id)
+                );
+                CREATE TABLE IF NOT EXISTS analyses (
+                    run_id TEXT NOT NULL, job_index INTEGER NOT NULL, candidate_id TEXT NOT NULL,
+                    result TEXT NOT NULL, match INTEGER, recommendation TEXT,
+                    name TEXT, similarity REAL, missing_skills TEXT,
+                    PRIMARY KEY (run_id, job_index, candidate_id)
+                );
+                CREATE INDEX IF NOT EXISTS analyses_by_match ON analyses (run_id, job_index, match);
+                CREATE INDEX IF NOT EXISTS analyses_by_similarity ON analyses (run_id, job_index, similarity);
+                CREATE TABLE IF NOT EXISTS shortlist (
+                    run_id TEXT NOT NULL, job_index INTEGER NOT NULL, candidate_id TEXT NOT NULL,
+                    entry TEXT NOT NULL, match INTEGER, added_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, job_index, candidate_id)
+                );
+                CREATE TABLE IF NOT EXISTS interviews (
+                    run_id TEXT NOT NULL, job_index INTEGER NOT NULL, candidate_id TEXT NOT NULL,
+                    status TEXT NOT NULL, email TEXT, updated_at REAL NOT NULL, error TEXT,
+                    PRIMARY KEY (run_id, job_index, candidate_id)
+                );
+                """
+            )
+            # Stores created before delivery errors were recorded
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(interviews)")}
+            if "error" not in columns:
+                self._conn.execute("ALTER TABLE interviews ADD COLUMN error TEXT")
+            # Abandoned runs are not kept forever; their rows in every table go with them
+            self._conn.execute("DELETE FROM runs WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+            for table in ("candidates", "analyses", "shortlist", "interviews"):
+                self._conn.execute(f"DELETE FROM {table} WHERE run_id NOT IN (SELECT run_id FROM runs)")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Start (or restart) a run: its jobs and candidates replace anything stored under the ID,
+    # apart from the shortlist and interview status, which survive re-processing
+    def save_run(self, run_id, job_summaries, candidates):
+        rows = [
+            (
+                run_id, c["candidate_id"], position, c.get("name"), c["text"],
+                json.dumps(c.get("extraction")), json.dumps(c.get("similarity"))
+            )
+            for position, c in enumerate(candidates)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, job_summaries, created_at) VALUES (?, ?, ?)",
+                (run_id, json.dumps(job_summaries), time.time())
+            )
+            self._conn.execute("DELETE FROM candidates WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM analyses WHERE run_id = ?", (run_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candidates (run_id, candidate_id, position, name, text, extraction, similarity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def job_summaries(self, run_id):
+        rows = self._query("SELECT job_summaries FROM runs WHERE run_id = ?", (run_id,))
+        return json.loads(rows[0][0]) if rows else []
+
+    # (candidate_ids, texts) of a run's candidates in upload order
+    def candidate_texts(self, run_id):
+        rows = self._query(
+            "SELECT candidate_id, text FROM candidates WHERE run_id = ? ORDER BY position", (run_id,)
+        )
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def candidate_count(self, run_id):
+        return self._query("SELECT COUNT(*) FROM candidates WHERE run_id = ?", (run_id,))[0][0]
+
+    # Per-file extraction details by candidate (empty for pasted or example resumes). Each
+    # candidate's extraction lists every uploaded file merged into it as a duplicate.
+    def extraction_stats(self, run_id):
+        rows = self._query(
+            "SELECT extraction FROM candidates WHERE run_id = ? ORDER BY position", (run_id,)
+        )
+        return [stats for row in rows for stats in (json.loads(row[0]) or [])]
+
+    # Local similarity (0-1) of every candidate to one job, by candidate ID
+    def similarity(self, run_id, job_index):
+        rows = self._query("SELECT candidate_id, similarity FROM candidates WHERE run_id = ?", (run_id,))
+        scores = {}
+        for candidate_id, similarity in rows:
+            similarity = json.loads(similarity) if similarity else None
+            if similarity and job_index < len(similarity):
+                scores[candidate_id] = similarity[job_index]
+        return scores
+
+    # Store one result per (job, candidate): results[job_index][candidate_index]. The columns
+    # beside the JSON result are what Step 4 filters and sorts on.
+    def save_analyses(self, run_id, results, candidate_ids):
+        similarity = {job_index: self.similarity(run_id, job_index) for job_index in range(len(results))}
+        rows = []
+        for job_index, row in enumerate(results):
+            for candidate_id, result in zip(candidate_ids, row):
+                failed = "error" in result
+                rows.append((
+                    run_id, job_index, candidate_id, json.dumps(result),
+                    None if failed else int(result.get("OverallMatch", "0%").strip("%")),
+                    result.get("Recommendation"),
+                    result.get("CandidateName"),
+                    similarity[job_index].get(candidate_id),
+                    json.dumps([skill.lower() for skill in result.get("MissingSkills", [])])
+                ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses "
+                "(run_id, job_index, candidate_id, result, match, recommendation, name, similarity, missing_skills) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def analysis_count(self, run_id, job_index):
+        return self._query(
+            "SELECT COUNT(*) FROM analyses WHERE run_id = ? AND job_index = ?", (run_id, job_index)
+        )[0][0]
+
+    # One job's results as (candidate_id, result) pairs in upload order
+    def analyses(self, run_id, job_index):
+        rows = self._query(
+            "SELECT a.candidate_id, a.result FROM analyses a "
+            "JOIN candidates c ON c.run_id = a.run_id AND c.candidate_id = a.candidate_id "
+            "WHERE a.run_id = ? AND a.job_index = ? ORDER BY c.position",
+            (run_id, job_index)
+        )
+        return [(candidate_id, json.loads(result)) for candidate_id, result in rows]
+
+    # Name, match and recommendation of every candidate for one job, in upload order,
+    # without decoding the stored results
+    def analysis_summary(self, run_id, job_index):
+        return self._query(
+            "SELECT a.candidate_id, c.position, a.name, a.match, a.recommendation FROM analyses a "
+            "JOIN candidates c ON c.run_id = a.run_id AND c.candidate_id = a.candidate_id "
+            "WHERE a.run_id = ? AND a.job_index = ? ORDER BY c.position",
+            (run_id, job_index)
+        )
+
+    # One page of a job's scored candidates (errors excluded) matching the filters, as
+    # (total matching, [(candidate_id, position, similarity, result)]). limit=None returns all.
+    def candidate_page(self, run_id, job_index, order="match_desc", min_match=0, max_match=100,
+                       recommendation=None, missing_skill=None, offset=0, limit=None):
+        where = "a.run_id = ? AND a.job_index = ? AND a.match BETWEEN ? AND ?"
+        params = [run_id, job_index, min_match, max_match]
+        if recommendation:
+            where += " AND a.recommendation = ?"
+            params.append(recommendation)
+        if missing_skill:
+            where += " AND EXISTS (SELECT 1 FROM json_each(a.missing_skills) WHERE value = ?)"
+            params.append(missing_skill.lower())
+
+        total = self._query(f"SELECT COUNT(*) FROM analyses a WHERE {where}", params)[0][0]
+        rows = self._query(
+            "SELECT a.candidate_id, c.position, a.similarity, a.result FROM analyses a "
+            "JOIN candidates c ON c.run_id = a.run_id AND c.candidate_id = a.candidate_id "
+            f"WHERE {where} ORDER BY {CANDIDATE_ORDERS[order]}, c.position LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset]
+        )
+        return total, [
+            (candidate_id, position, similarity, json.loads(result))
+            for candidate_id, position, similarity, result in rows
+        ]
+
+    # Distinct missing skills across a job's scored candidates, for the Step 4 filter
+    def missing_skills(self, run_id, job_index):
+        rows = self._query(
+            "SELECT DISTINCT s.value FROM analyses a, json_each(a.missing_skills) s "
+            "WHERE a.run_id = ? AND a.job_index = ? AND a.match IS NOT NULL ORDER BY s.value",
+            (run_id, job_index)
+        )
+        return [row[0] for row in rows]
+
+    def analysis(self, run_id, job_index, candidate_id):
+        rows = self._query(
+            "SELECT result FROM analyses WHERE run_id = ? AND job_index = ? AND candidate_id = ?",
+            (run_id, job_index, candidate_id)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    # Shortlist entries (from shortlist_candidates, plus job_index and candidate_id), best match first
+    def shortlist(self, run_id):
+        rows = self._query(
+            "SELECT job_index, candidate_id, entry FROM shortlist WHERE run_id = ? ORDER BY match DESC, added_at",
+            (run_id,)
+        )
+        return [
+            dict(json.loads(entry), job_index=job_index, candidate_id=candidate_id)
+            for job_index, candidate_id, entry in rows
+        ]
+
+    def shortlisted_ids(self, run_id, job_index):
+        rows = self._query(
+            "SELECT candidate_id FROM shortlist WHERE run_id = ? AND job_index = ?", (run_id, job_index)
+        )
+        return {row[0] for row in rows}
+
+    def add_to_shortlist(self, run_id, job_index, candidate_id, entry):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shortlist (run_id, job_index, candidate_id, entry, match, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, job_index, candidate_id, json.dumps(entry), entry.get("match_percentage"), time.time())
+            )
+
+    def remove_from_shortlist(self, run_id, job_index, candidate_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM shortlist WHERE run_id = ? AND job_index = ? AND candidate_id = ?",
+                (run_id, job_index, candidate_id)
+            )
+
+    # Replace one job's shortlist with entries keyed by candidate ID
+    def replace_shortlist(self, run_id, job_index, entries):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM shortlist WHERE run_id = ? AND job_index = ?", (run_id, job_index))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO shortlist (run_id, job_index, candidate_id, entry, match, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, job_index, candidate_id, json.dumps(entry), entry.get("match_percentage"), now)
+                    for candidate_id, entry in entries
+                ]
+            )
+
+    def save_interview(self, run_id, job_index, candidate_id, status, email=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO interviews (run_id, job_index, candidate_id, status, email, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, job_index, candidate_id, status, json.dumps(email), time.time())
+            )
+
+    # Update the status (and the reason a delivery failed) alone, keeping the stored draft
+    def set_interview_status(self, run_id, job_index, candidate_id, status, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE interviews SET status = ?, error = ?, updated_at = ? "
+                "WHERE run_id = ? AND job_index = ? AND candidate_id = ?",
+                (status, error, time.time(), run_id, job_index, candidate_id)
+            )
+
+    # Interview status, latest email draft and delivery error per (job_index, candidate_id)
+    def interviews(self, run_id):
+        rows = self._query(
+            "SELECT job_index, candidate_id, status, email, error FROM interviews WHERE run_id = ?", (run_id,)
+        )
+        return {
+            (job_index, candidate_id): {"status": status, "email": json.loads(email) if email else None, "error": error}
+            for job_index, candidate_id, status, email, error in rows
+        }
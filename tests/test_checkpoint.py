@@ -0,0 +1,26 @@
+import checkpoint
+from checkpoint import RunCheckpoint, make_run_id
+
+def test_run_id_follows_the_analysis_settings(monkeypatch):
+    jobs, candidates = [{"JobTitle": "Data Analyst"}], ["b", "a"]
+    run_id = make_run_id(jobs, candidates)
+    assert make_run_id(jobs, ["a", "b"]) == run_id
+
+    monkeypatch.setattr(checkpoint, "GEMINI_MODEL", "another-model")
+    assert make_run_id(jobs, candidates) != run_id
+    monkeypatch.undo()
+
+    monkeypatch.setattr(checkpoint, "CV_ANALYSIS_PROMPT_VERSION", "next")
+    assert make_run_id(jobs, candidates) != run_id
+    monkeypatch.undo()
+
+    monkeypatch.setattr(checkpoint, "PRESCREEN_MODE", "skip")
+    assert make_run_id(jobs, candidates) != run_id
+
+def test_cleared_checkpoint_restores_nothing(tmp_path):
+    saved = RunCheckpoint(str(tmp_path / "cache.db"), "run")
+    saved.save_result("a", 0, {"OverallMatch": "80%"})
+    assert saved.results() == {("a", 0): {"OverallMatch": "80%"}}
+
+    saved.clear()
+    assert RunCheckpoint(str(tmp_path / "cache.db"), "run").results() == {}
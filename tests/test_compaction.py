@@ -0,0 +1,23 @@
+from compaction import compact_resume
+
+PAGES = [
+    "Alex Johnson - Resume\nExperience\nAcme Corp\nResponsibilities:\n- Built reporting pipelines\n"
+    "Beta Inc\nResponsibilities:\n- Ran the data warehouse\nConfidential\nPage 1 of 3",
+    "Alex Johnson - Resume\nGamma Ltd\nResponsibilities:\n- Owned dashboards\nConfidential\nPage 2 of 3",
+    "Alex Johnson - Resume\nSkills\nSQL, Python\nConfidential\nPage 3 of 3"
+]
+
+def test_page_headers_and_footers_are_kept_once():
+    text, trimmed = compact_resume("\f".join(PAGES))
+    assert not trimmed
+    assert text.count("Alex Johnson - Resume") == 1
+    assert text.count("Confidential") == 1
+    assert "Page 2 of 3" not in text
+
+def test_repeated_lines_inside_pages_are_kept():
+    text, _ = compact_resume("\f".join(PAGES))
+    assert text.count("Responsibilities:") == 3
+
+    # Without page breaks nothing counts as a header or footer
+    text, _ = compact_resume("\n".join(PAGES))
+    assert text.count("Alex Johnson - Resume") == 3
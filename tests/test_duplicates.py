@@ -0,0 +1,43 @@
+from checkpoint import candidate_ids_for
+from duplicates import group_duplicates
+from extraction import IMAGE_PDF_MESSAGE, has_resume_text
+
+RESUME = """Alex Johnson
+Data Analyst with 5 years of experience in SQL, Python and Tableau.
+Built reporting pipelines and dashboards for finance and marketing teams."""
+
+def test_exact_and_near_copies_are_merged():
+    near_copy = RESUME.replace("5 years", "five years")
+    assert group_duplicates([RESUME, "Taylor Wilson, UX designer", RESUME, near_copy], 0.5) == [[0, 2, 3], [1]]
+
+def test_same_template_for_different_people_is_not_merged():
+    other = RESUME.replace("Alex Johnson", "Sam Rivera") + "\nsam.rivera@mail.com | (555) 010-2233"
+    mine = RESUME + "\nalex.j@mail.com | (555) 010-1177"
+    assert group_duplicates([mine, other], 0.5) == [[0], [1]]
+
+    # The same person's near copy is still merged
+    assert [sorted(group) for group in group_duplicates([mine, mine.replace("5 years", "five years")], 0.5)] == [[0, 1]]
+
+def test_zero_threshold_only_merges_exact_copies():
+    assert group_duplicates([RESUME, RESUME.replace("5 years", "five years"), RESUME], 0) == [[0, 2], [1]]
+
+def test_placeholder_and_error_texts_are_never_merged():
+    error = "Error extracting text from PDF: EOF marker not found"
+    results = [
+        {"text": IMAGE_PDF_MESSAGE, "error": None},
+        {"text": RESUME, "error": None},
+        {"text": IMAGE_PDF_MESSAGE, "error": None},
+        {"text": error, "error": "EOF marker not found"},
+        {"text": error, "error": "EOF marker not found"},
+        {"text": RESUME, "error": None}
+    ]
+    texts = [result["text"] for result in results]
+    separate = [k for k, result in enumerate(results) if not has_resume_text(result)]
+
+    assert separate == [0, 2, 3, 4]
+    assert group_duplicates(texts, 0.9, separate=separate) == [[0], [1, 5], [2], [3], [4]]
+
+def test_candidate_ids_stay_unique_for_repeated_texts():
+    candidate_ids = candidate_ids_for([IMAGE_PDF_MESSAGE, RESUME, IMAGE_PDF_MESSAGE])
+    assert len(set(candidate_ids)) == 3
+    assert candidate_ids == candidate_ids_for([IMAGE_PDF_MESSAGE, RESUME, IMAGE_PDF_MESSAGE])
@@ -0,0 +1,129 @@
+import smtplib
+
+from mailer import (
+    DELIVERY_FAILED, QUEUED, SENT, DeliveryQueue, build_invitation_message, is_transient, recipient_address
+)
+
+# SMTP server stand-in: records connections and messages, and fails sends to an address with
+# the exceptions scripted for it, one per attempt
+class FakeServer:
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.connections = []
+        self.delivered = []
+
+    def connect(self, host, port, timeout=None):
+        connection = FakeSMTP(self)
+        self.connections.append(connection)
+        return connection
+
+class FakeSMTP:
+    def __init__(self, server):
+        self.server = server
+        self.logged_in = False
+        self.closed = False
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logged_in = True
+
+    def send_message(self, message):
+        failures = self.server.failures.get(message["To"])
+        if failures:
+            raise failures.pop(0)
+        self.server.delivered.append((self, message["To"]))
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+# Time that only moves when the queue sleeps
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def make_queue(server, clock, per_minute=0, statuses=None):
+    statuses = [] if statuses is None else statuses
+    return DeliveryQueue(
+        "smtp.example.com", 587, "hr@example.com", "secret", per_minute=per_minute, max_retries=2,
+        on_status=lambda key, status, error: statuses.append((key, status, error)),
+        smtp_factory=server.connect, clock=clock, sleep=clock.sleep
+    )
+
+def invitation(address):
+    return build_invitation_message(
+        {"candidate_email": address, "email_subject": "Interview", "email_body": "Hello"}, "hr@example.com"
+    )
+
+def test_recipient_is_the_email_in_the_contact_details():
+    assert recipient_address({"candidate_email": "alex@x.com, (555) 123-4567"}) == "alex@x.com"
+    assert recipient_address({"candidate_email": "Not provided"}) is None
+    assert invitation("Phone: 555-0100 / taylor.w@mail.co.uk")["To"] == "taylor.w@mail.co.uk"
+
+def test_messages_share_one_connection():
+    server, clock, statuses = FakeServer(), FakeClock(), []
+    delivery = make_queue(server, clock, statuses=statuses)
+    for k in range(3):
+        assert delivery.enqueue(("run", 0, f"c{k}"), invitation(f"c{k}@x.com"))
+    delivery.join()
+
+    assert len(server.connections) == 1 and server.connections[0].logged_in
+    assert [address for _, address in server.delivered] == ["c0@x.com", "c1@x.com", "c2@x.com"]
+    assert delivery.stats() == {"pending": 0, "sent": 3, "failed": 0, "retries": 0, "connections": 1}
+    assert [status for _, status, _ in statuses].count(SENT) == 3
+    assert not delivery.is_pending(("run", 0, "c0"))
+
+def test_temporary_failure_is_retried_on_a_new_connection():
+    server = FakeServer({"a@x.com": [smtplib.SMTPResponseException(451, b"try again later")]})
+    clock, statuses = FakeClock(), []
+    delivery = make_queue(server, clock, statuses=statuses)
+    delivery.enqueue(("run", 0, "a"), invitation("a@x.com"))
+    delivery.join()
+
+    assert [address for _, address in server.delivered] == ["a@x.com"]
+    assert server.connections[0].closed and len(server.connections) == 2
+    assert delivery.retries == 1 and len(clock.sleeps) == 1
+    assert statuses == [(("run", 0, "a"), QUEUED, None), (("run", 0, "a"), SENT, None)]
+
+def test_permanent_failure_is_reported_without_retrying():
+    refused = smtplib.SMTPRecipientsRefused({"b@x.com": (550, b"no such user")})
+    assert not is_transient(refused)
+
+    server, clock, statuses = FakeServer({"b@x.com": [refused]}), FakeClock(), []
+    delivery = make_queue(server, clock, statuses=statuses)
+    delivery.enqueue(("run", 0, "b"), invitation("b@x.com"))
+    delivery.join()
+
+    assert not server.delivered and delivery.retries == 0 and not clock.sleeps
+    assert delivery.errors[("run", 0, "b")] == "550 no such user"
+    assert statuses[-1] == (("run", 0, "b"), DELIVERY_FAILED, "550 no such user")
+
+def test_only_temporary_smtp_and_network_errors_are_transient():
+    assert is_transient(smtplib.SMTPServerDisconnected("connection lost"))
+    assert is_transient(ConnectionResetError())
+    assert is_transient(smtplib.SMTPSenderRefused(421, b"busy", "hr@example.com"))
+    assert not is_transient(smtplib.SMTPNotSupportedError("SMTP AUTH extension not supported"))
+    assert not is_transient(smtplib.SMTPAuthenticationError(535, b"bad credentials"))
+
+def test_sends_are_throttled_to_the_rate_limit():
+    server, clock = FakeServer(), FakeClock()
+    delivery = make_queue(server, clock, per_minute=2)
+    for k in range(4):
+        delivery.enqueue(("run", 0, f"c{k}"), invitation(f"c{k}@x.com"))
+    delivery.join()
+
+    # Two sends fit in the first minute's allowance, the next two wait 30s each
+    assert len(server.delivered) == 4
+    assert abs(sum(clock.sleeps) - 60.0) < 1e-6
@@ -0,0 +1,43 @@
+from screening import build_skill_index, prescreen_cv, stem
+
+JD_SUMMARY = {
+    "RequiredSkills": ["Stakeholder Communication", "Roadmap Planning", "Agile Methodologies"],
+    "PreferredSkills": ["Data Analysis"]
+}
+
+RESUME = """Jordan Lee - Senior Product Manager
+Led roadmaps for three B2B products and managed stakeholders across sales and engineering.
+Planned quarterly releases, ran Scrum ceremonies and communicated priorities to executives.
+Analyzed usage data in SQL to decide what to build next."""
+
+def test_inflections_share_a_stem():
+    assert stem("stakeholders") == stem("stakeholder")
+    assert stem("methodologies") == stem("methodology")
+    assert stem("managed") == stem("managing") == stem("manage")
+    assert stem("databases") == stem("database")
+    assert stem("analysis") == "analysis" and stem("aws") == "aws"
+
+def test_inflected_skills_are_matched():
+    screen = prescreen_cv(RESUME, build_skill_index(JD_SUMMARY))
+    assert "Roadmap Planning" in screen["matched"]
+    assert "Agile Methodologies" in screen["missing"]
+    assert screen["score"] >= 50
+
+def test_partly_matched_skills_count_towards_the_score():
+    screen = prescreen_cv("Stakeholder management", build_skill_index(JD_SUMMARY))
+    assert screen["matched"] == [] and screen["score"] > 0
+
+def test_texts_without_resume_content_are_not_rejected_locally(monkeypatch):
+    import agents
+    from extraction import IMAGE_PDF_MESSAGE
+
+    monkeypatch.setattr(agents, "PRESCREEN_MODE", "skip")
+    monkeypatch.setattr(agents, "PRESCREEN_CUTOFF", 10)
+    cv_texts = [IMAGE_PDF_MESSAGE, "Error extracting text from PDF: EOF marker not found", "Pastry chef", RESUME]
+    matrix = [[None] * len(cv_texts)]
+
+    pairs = agents.prescreen_pairs(cv_texts, [JD_SUMMARY], matrix)
+
+    # The unrelated resume is scored locally; the unreadable files are sent, after the real one
+    assert matrix[0][2]["PreScreened"] and pairs[0] == (0, 3)
+    assert sorted(pairs[1:]) == [(0, 0), (0, 1)]